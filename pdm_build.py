@@ -0,0 +1,36 @@
+"""Build hook compiling the built-in templates to Python modules in wheels."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+_TEMPLATES = Path("src", "shellman", "_internal", "templates")
+
+
+def _load(path: Path, name: str) -> ModuleType:
+    # Load modules by path: importing the `shellman` package would require its runtime dependencies.
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def pdm_build_initialize(context: Any) -> None:
+    """Compile the built-in templates in the build directory, whose files are added to the wheel.
+
+    Parameters:
+        context: The build context.
+    """
+    if context.target != "wheel":
+        return
+    templates = context.root / _TEMPLATES
+    precompile = _load(templates / "precompile.py", "_shellman_precompile")
+    filters = _load(templates / "filters.py", "_shellman_filters")
+    target = context.build_dir / "shellman" / "_internal" / "templates" / "compiled"
+    precompile._compile(os.fspath(templates / "data"), os.fspath(target), filters.FILTERS)
@@ -0,0 +1,858 @@
+# Script to benchmark shellman's reading and rendering paths.
+#
+# Usage: python scripts/benchmark.py [BENCHMARK...]
+# Run without arguments to run every benchmark.
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from shellman._internal import debug
+from shellman._internal.cli import _render, _RenderSession, _write
+from shellman._internal.cli import main as shellman_main
+from shellman._internal.index import SectionIndex, _function_name
+from shellman._internal.reader import (
+    _CHUNK_SIZE,
+    DocBlock,
+    DocBuffer,
+    DocFile,
+    DocLine,
+    DocStream,
+    MergedDoc,
+    _doc_type,
+    _merge,
+    _preprocess_lines,
+    _preprocess_mmap,
+    read_file_async,
+    read_files,
+    tag_no_value_regex,
+    tag_value_regex,
+)
+from shellman._internal.tags import FunctionTag, OptionTag
+from shellman._internal.templates import Template, _get_builtin_path, _get_compiled_path, builtin_env, templates
+from shellman._internal.templates.filters import FILTERS
+from shellman._internal.templates.precompile import _compile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+_code_lines = (
+    'main() {\n  local name="${1##*/}"\n  case "$1" in\n    -h|--help) usage; exit 0 ;;\n  esac\n}\n'
+    'for file in "$@"; do\n  [ -f "$file" ] && echo "processing ${file%.sh}"\ndone\n'
+)
+_doc_lines = (
+    "## \\function process_file(path)\n"
+    "## \\function-brief Process a single file.\n"
+    "## \\function-argument path: The path to the file.\n"
+    "## \\function-return 0: Success.\n"
+)
+
+
+def _generate_script(path: str, size: int, doc_ratio: int = 20) -> None:
+    # Write a script of roughly `size` bytes, with one doc block every `doc_ratio` code blocks.
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("#!/bin/bash\n## \\brief Benchmark script.\n## \\usage bench [-h]\n")
+        written = 0
+        index = 0
+        while written < size:
+            chunk = _doc_lines if index % doc_ratio == 0 else _code_lines
+            file.write(chunk)
+            written += len(chunk)
+            index += 1
+
+
+def _check_same(expected: object, actual: object) -> None:
+    if expected != actual:
+        raise RuntimeError("benchmarked paths produced different results")
+
+
+def _report(name: str, seconds: float, number: int) -> None:
+    print(f"  {name:<24} {seconds / number * 1000:10.2f} ms")
+
+
+def bench_reader_mmap() -> None:
+    """Compare the text reader with the memory-mapped reader on multi-MB inputs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for megabytes in (1, 8, 32):
+            path = os.path.join(tmpdir, f"script_{megabytes}.sh")
+            _generate_script(path, megabytes * 1024 * 1024)
+            _check_same(DocFile(path).sections, DocFile(path, use_mmap=True).sections)
+            number = 5
+            print(f"{megabytes} MB:")
+            _report("text", timeit.timeit(lambda: DocFile(path), number=number), number)  # noqa: B023
+            _report("mmap", timeit.timeit(lambda: DocFile(path, use_mmap=True), number=number), number)  # noqa: B023
+
+
+def bench_reader_shards() -> None:
+    """Compare serial parsing of one large file with parallel parsing of its shards."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "library.sh")
+        _generate_script(path, 32 * 1024 * 1024, doc_ratio=2)
+        _check_same(DocFile(path).sections, DocFile(path, shards=4).sections)
+        number = 3
+        _report("serial", timeit.timeit(lambda: DocFile(path, use_mmap=True), number=number), number)
+        for shards in (2, 4, 8):
+            _report(f"{shards} shards", timeit.timeit(lambda: DocFile(path, shards=shards), number=number), number)  # noqa: B023
+
+
+def _read_stream(path: str, chunk_size: int | None = None) -> DocStream:
+    with open(path, encoding="utf-8") as stream:
+        return DocStream(stream, chunk_size=chunk_size)
+
+
+def bench_reader_stream() -> None:
+    """Compare line-by-line and chunked reading of streams with the file reader."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for megabytes in (1, 8, 32):
+            path = os.path.join(tmpdir, f"script_{megabytes}.sh")
+            _generate_script(path, megabytes * 1024 * 1024)
+            _check_same(_read_stream(path).sections, _read_stream(path, _CHUNK_SIZE).sections)
+            number = 5
+            print(f"{megabytes} MB:")
+            _report("stream (lines)", timeit.timeit(lambda: _read_stream(path), number=number), number)  # noqa: B023
+            _report("stream (chunks)", timeit.timeit(lambda: _read_stream(path, _CHUNK_SIZE), number=number), number)  # noqa: B023
+            _report("file (mmap)", timeit.timeit(lambda: DocFile(path, use_mmap=True), number=number), number)  # noqa: B023
+
+
+def bench_buffer_edits() -> None:
+    """Compare incremental edits of a large buffer with full parses, for nearby and scattered edits."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "library.sh")
+        _generate_script(path, 8 * 1024 * 1024, doc_ratio=2)
+        buffer = DocBuffer.from_file(path)
+        size = len(buffer.lines)
+        print(f"{size} lines, {len(buffer._starts)} blocks:")
+        edit = ["## \\function-brief Edited.", "echo edited"]
+        number = 200
+        nearby = iter(range(size // 2, size))
+        scattered = iter([(index * 7919) % (size - 10) for index in range(number)])
+        _report(
+            "edit (nearby)",
+            timeit.timeit(lambda: buffer.edit(next(nearby), next(nearby), edit), number=number),
+            number,
+        )
+        _report(
+            "edit (scattered)",
+            timeit.timeit(lambda: buffer.edit((line := next(scattered)), line + 1, edit), number=number),
+            number,
+        )
+        _check_same(DocStream(buffer.lines).sections, buffer.sections)
+        _report("full parse", timeit.timeit(lambda: DocStream(buffer.lines), number=3), 3)
+
+
+class _DictDocLine:
+    # The former `DocLine`: a per-instance dictionary, and paths and tags not interned.
+    def __init__(self, path: str, lineno: int, tag: str | None, value: str) -> None:
+        self.path = path
+        self.lineno = lineno
+        self.tag = tag or ""
+        self.value = value
+
+
+class _CachedDocLine(DocLine):
+    # A `DocLine` caching its doc type, invalidated when its tag or value change.
+    __slots__ = ("_doc_type",)
+    _doc_type: str | None
+
+    def __setattr__(self, name: str, value: object) -> None:
+        object.__setattr__(self, name, value)
+        if name in ("tag", "value"):
+            object.__setattr__(self, "_doc_type", None)
+
+    @property
+    def doc_type(self) -> str:
+        doc_type = self._doc_type
+        if doc_type is None:
+            doc_type = self._doc_type = _doc_type(self.tag, self.value)
+        return doc_type
+
+
+def bench_doc_lines() -> None:
+    """Compare memory and build time of documentation lines, and the cost of caching their doc type."""
+    # Paths and tags are built for each line, like when reading them from files.
+    rows = [(f"/project/lib/{index // 1000}.sh", index, "".join(("func", "tion")), "f()") for index in range(200_000)]
+    classes: list[tuple[str, Callable[..., object]]] = [
+        ("dict", _DictDocLine),
+        ("slots", DocLine),
+        ("cached", _CachedDocLine),
+    ]
+    print(f"{len(rows)} lines:")
+    for name, cls in classes:
+        memory = _peak_memory(lambda: [cls(*row) for row in rows])  # noqa: B023
+        print(f"  {f'peak ({name})':<24} {memory / 1024 / 1024:10.2f} MiB")
+    number = 5
+    for name, cls in classes:
+        _report(f"build ({name})", timeit.timeit(lambda: [cls(*row) for row in rows], number=number), number)  # noqa: B023
+    lines = [DocLine(*row) for row in rows]
+    cached = [_CachedDocLine(*row) for row in rows]
+    _check_same([line.doc_type for line in lines], [line.doc_type for line in cached])
+    _report("doc types", timeit.timeit(lambda: [line.doc_type for line in lines], number=number), number)
+    _report("doc types (cached)", timeit.timeit(lambda: [line.doc_type for line in cached], number=number), number)
+
+
+def _preprocess_lines_cascade(lines: Iterable[tuple[str, int, str]]) -> Iterator[DocBlock]:
+    # The former implementation of `_preprocess_lines`, trying two regexes per line.
+    current_block = DocBlock()
+    for path, lineno, line in lines:
+        line = line[3:]  # noqa: PLW2901
+        res = tag_value_regex.search(line)
+        if res:
+            tag, value = res.groups()
+            if current_block and not tag.startswith(current_block.tag + "-"):
+                yield current_block
+                current_block = DocBlock()
+            current_block.append(DocLine(path, lineno, tag, value))
+        else:
+            res = tag_no_value_regex.search(line)
+            if res:
+                tag = res.groups()[0]
+                if current_block and not tag.startswith(current_block.tag + "-"):
+                    yield current_block
+                    current_block = DocBlock()
+                current_block.append(DocLine(path, lineno, tag, ""))
+            else:
+                current_block.append(DocLine(path, lineno, None, line))
+    if current_block:
+        yield current_block
+
+
+def bench_tokenizer() -> None:
+    """Compare the single-pass tokenizer with the two-regex cascade when grouping lines."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "script.sh")
+        _generate_script(path, 8 * 1024 * 1024, doc_ratio=1)
+        lines = list(_preprocess_mmap(path))
+        print(f"{len(lines)} doc lines:")
+        _check_same(
+            [str(block) for block in _preprocess_lines_cascade(lines)],
+            [str(block) for block in _preprocess_lines(lines)],
+        )
+        number = 5
+        _report("two regexes", timeit.timeit(lambda: list(_preprocess_lines_cascade(lines)), number=number), number)
+        _report("tokenizer", timeit.timeit(lambda: list(_preprocess_lines(lines)), number=number), number)
+
+
+def _function_from_lines_chain(lines: list[DocLine]) -> FunctionTag:
+    # The former implementation of `FunctionTag.from_lines`, an if/elif chain on the line's tag.
+    brief, prototype = "", ""
+    description, arguments, return_codes, preconditions = [], [], [], []
+    seealso, stderr, stdin, stdout = [], [], [], []
+    for line in lines:
+        if line.tag == "function":
+            prototype = line.value
+        elif line.tag == "function-brief":
+            brief = line.value
+        elif line.tag == "function-description":
+            description.append(line.value)
+        elif line.tag == "function-argument":
+            arguments.append(line.value)
+        elif line.tag == "function-precondition":
+            preconditions.append(line.value)
+        elif line.tag == "function-return":
+            return_codes.append(line.value)
+        elif line.tag == "function-seealso":
+            seealso.append(line.value)
+        elif line.tag == "function-stderr":
+            stderr.append(line.value)
+        elif line.tag == "function-stdin":
+            stdin.append(line.value)
+        elif line.tag == "function-stdout":
+            stdout.append(line.value)
+        else:
+            description.append(line.value)
+    return FunctionTag(
+        prototype=prototype,
+        brief=brief,
+        description="\n".join(description),
+        arguments=arguments,
+        preconditions=preconditions,
+        return_codes=return_codes,
+        seealso=seealso,
+        stderr=stderr,
+        stdin=stdin,
+        stdout=stdout,
+    )
+
+
+def _option_from_lines_search(lines: list[DocLine]) -> OptionTag:
+    # The former implementation of `OptionTag.from_lines`, searching an inline pattern for each option.
+    short, long, positional, default, group = "", "", "", "", ""
+    description = []
+    for line in lines:
+        if line.tag == "option":
+            search = re.search(r"^(?P<short>-\w)?(?:, )?(?P<long>--[\w-]+)? ?(?P<positional>.+)?", line.value)
+            if search:
+                short, long, positional = search.groups(default="")
+            else:
+                positional = line.value
+        elif line.tag == "option-default":
+            default = line.value
+        elif line.tag == "option-group":
+            group = line.value
+        else:
+            description.append(line.value)
+    return OptionTag(
+        short=short,
+        long=long,
+        positional=positional,
+        default=default,
+        group=group,
+        description="\n".join(description),
+    )
+
+
+_function_doc_lines = (
+    "## \\function process_file(path, mode)\n"
+    "## \\function-brief Process a single file.\n"
+    "## \\function-description Read the file, then transform it.\n"
+    "## Files are processed in place.\n"
+    "## \\function-precondition The file exists.\n"
+    "## \\function-argument path: The path to the file.\n"
+    "## \\function-argument mode: The processing mode.\n"
+    "## \\function-return 0: Success.\n"
+    "## \\function-return 1: Failure.\n"
+    "## \\function-stdout The processed file name.\n"
+    "## \\function-stderr Errors.\n"
+    "## \\function-seealso process_files\n"
+    "## \\option -m, --mode MODE\n"
+    "## \\option-default fast\n"
+    "## The processing mode.\n"
+)
+
+
+def bench_tags() -> None:
+    """Compare the schema-compiled tag parsers with the former hand-written ones on a function-heavy corpus."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "library.sh")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(_function_doc_lines * 20000)
+        blocks = list(_preprocess_lines(_preprocess_mmap(path)))
+        functions = [block.lines for block in blocks if block.tag == "function"]
+        options = [block.lines for block in blocks if block.tag == "option"]
+        _check_same(
+            [_function_from_lines_chain(lines) for lines in functions],
+            [FunctionTag.from_lines(lines) for lines in functions],
+        )
+        _check_same(
+            [_option_from_lines_search(lines) for lines in options],
+            [OptionTag.from_lines(lines) for lines in options],
+        )
+        number = 5
+        print(f"{len(functions)} functions, {len(options)} options:")
+        _report(
+            "functions (if/elif)",
+            timeit.timeit(lambda: [_function_from_lines_chain(lines) for lines in functions], number=number),
+            number,
+        )
+        _report(
+            "functions (schema)",
+            timeit.timeit(lambda: [FunctionTag.from_lines(lines) for lines in functions], number=number),
+            number,
+        )
+        _report(
+            "options (re.search)",
+            timeit.timeit(lambda: [_option_from_lines_search(lines) for lines in options], number=number),
+            number,
+        )
+        _report(
+            "options (schema)",
+            timeit.timeit(lambda: [OptionTag.from_lines(lines) for lines in options], number=number),
+            number,
+        )
+
+
+def _import_time(module: str) -> float:
+    # Cumulative import time of a module, in seconds, measured in a fresh interpreter.
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).parent.parent / "src")}
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    for line in process.stderr.splitlines():
+        _, _, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if name == module:
+            return int(cumulative) / 1_000_000
+    raise RuntimeError(f"module {module} was not imported")
+
+
+def bench_import() -> None:
+    """Measure the import time of tags, whose schemas are compiled on first use, and of the command line."""
+    number = 10
+    for module in ("shellman._internal.tags", "shellman._internal.cli"):
+        _report(module, sum(_import_time(module) for _ in range(number)), number)
+
+
+def _doc_file_eager(path: str) -> DocFile:
+    # Build every tag when parsing, like `_process_blocks` did before sections were lazy.
+    doc = DocFile(path, use_mmap=True)
+    doc.sections = dict(doc.sections.items())
+    return doc
+
+
+def bench_lazy_tags() -> None:
+    """Compare building all tags when parsing with building them on first access, when rendering usage only."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "library.sh")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("## \\usage library [-m MODE] FILE\n" + _function_doc_lines * 20000)
+        template = templates["usagetext"]
+        _check_same(_render(template, _doc_file_eager(path)), _render(template, DocFile(path, use_mmap=True)))
+        number = 5
+        _report(
+            "parse+usage (eager)",
+            timeit.timeit(lambda: _render(template, _doc_file_eager(path)), number=number),
+            number,
+        )
+        _report(
+            "parse+usage (lazy)",
+            timeit.timeit(lambda: _render(template, DocFile(path, use_mmap=True)), number=number),
+            number,
+        )
+
+
+def bench_header() -> None:
+    """Compare full scans with header-only scans when rendering usage, on scripts of growing length."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        template = templates["usagetext"]
+        for megabytes in (1, 8, 32):
+            path = os.path.join(tmpdir, f"script_{megabytes}.sh")
+            _generate_script(path, megabytes * 1024 * 1024)
+            _check_same(
+                _render(template, DocFile(path, only_sections=template.doc_sections)),
+                _render(template, DocFile(path, header_only=True)),
+            )
+            number = 5
+            print(f"{megabytes} MB:")
+            _report(
+                "full scan",
+                timeit.timeit(lambda: _render(template, DocFile(path, use_mmap=True)), number=number),  # noqa: B023
+                number,
+            )
+            _report(
+                "header only",
+                timeit.timeit(lambda: _render(template, DocFile(path, header_only=True)), number=number),  # noqa: B023
+                number,
+            )
+
+
+_LOAD_TEMPLATES = (
+    "from shellman._internal.templates import templates\n"
+    "for name in ('helptext', 'manpage', 'manpage.md', 'wikipage', 'usagetext'):\n"
+    "    templates[name].template\n"
+)
+
+
+def _run_load_templates(cache_dir: str) -> None:
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).parent.parent / "src"), "SHELLMAN_TEMPLATE_CACHE": cache_dir}
+    subprocess.run([sys.executable, "-c", _LOAD_TEMPLATES], check=True, env=env)  # noqa: S603
+
+
+def bench_template_cache() -> None:
+    """Compare startup times (import and load of built-in templates) without and with the bytecode cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = os.path.join(tmpdir, "cache")
+
+        def cold() -> None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            _run_load_templates(cache_dir)
+
+        number = 10
+        _report("no cache", timeit.timeit(lambda: _run_load_templates(""), number=number), number)
+        _report("cold cache", timeit.timeit(cold, number=number), number)
+        _run_load_templates(cache_dir)
+        _report("warm cache", timeit.timeit(lambda: _run_load_templates(cache_dir), number=number), number)
+
+
+def bench_precompiled() -> None:
+    """Compare cold-start times with templates compiled from sources, from the bytecode cache, and ahead of time."""
+    compiled_dir = _get_compiled_path()
+    if os.path.exists(compiled_dir):
+        raise RuntimeError(f"remove {compiled_dir} first")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = os.path.join(tmpdir, "cache")
+
+        def cold() -> None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            _run_load_templates(cache_dir)
+
+        number = 10
+        _report("sources", timeit.timeit(lambda: _run_load_templates(""), number=number), number)
+        _report("bytecode cache (cold)", timeit.timeit(cold, number=number), number)
+        _report("bytecode cache (warm)", timeit.timeit(lambda: _run_load_templates(cache_dir), number=number), number)
+        _compile(_get_builtin_path(), compiled_dir, FILTERS)
+        try:
+            _report("compiled modules", timeit.timeit(lambda: _run_load_templates(""), number=number), number)
+        finally:
+            shutil.rmtree(compiled_dir)
+
+
+_PLUGIN_MODULE = (
+    "import {module}\n"
+    "from shellman._internal.templates import Template, builtin_env\n"
+    "templates = {{'plugin-{index}': Template(builtin_env, 'usagetext'), 'plugin-{index}.txt': Template(builtin_env, 'usagetext')}}\n"
+)
+_PLUGIN_IMPORTS = ("decimal", "email.parser", "http.client", "xml.dom.minidom", "statistics", "urllib.request")
+
+# The former behavior of `main`: import every plugin before parsing arguments.
+_MAIN_EAGER = (
+    "import sys\n"
+    "from importlib.metadata import entry_points\n"
+    "from shellman._internal import templates\n"
+    "for entry_point in entry_points(group='shellman'):\n"
+    "    templates.templates.update(entry_point.load())\n"
+    "templates._plugin_index = lambda: {}\n"
+    "from shellman._internal.cli import main\n"
+    "main(sys.argv[1:])\n"
+)
+_MAIN_LAZY = "import sys\nfrom shellman._internal.cli import main\nmain(sys.argv[1:])\n"
+
+
+def _write_plugins(site_dir: str, number: int) -> None:
+    # Install fake plugin distributions: a module and a dist-info directory declaring an entry point.
+    for index in range(number):
+        module = f"shellman_plugin_{index}"
+        with open(os.path.join(site_dir, f"{module}.py"), "w", encoding="utf-8") as file:
+            file.write(_PLUGIN_MODULE.format(module=_PLUGIN_IMPORTS[index % len(_PLUGIN_IMPORTS)], index=index))
+        dist_info = os.path.join(site_dir, f"{module}-1.0.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), "w", encoding="utf-8") as file:
+            file.write(f"Metadata-Version: 2.1\nName: {module}\nVersion: 1.0\n")
+        with open(os.path.join(dist_info, "entry_points.txt"), "w", encoding="utf-8") as file:
+            file.write(f"[shellman]\n{module} = {module}:templates\n")
+
+
+def bench_plugins() -> None:
+    """Compare the run time of `shellman -t helptext` when importing every plugin and with the plugin index."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        site_dir = os.path.join(tmpdir, "site")
+        os.makedirs(site_dir)
+        _write_plugins(site_dir, 30)
+        script = os.path.join(tmpdir, "script.sh")
+        _generate_script(script, 4 * 1024)
+        src = str(Path(__file__).parent.parent / "src")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join((src, site_dir)), "SHELLMAN_TEMPLATE_CACHE": tmpdir}
+
+        def run(code: str, *args: str) -> None:
+            subprocess.run([sys.executable, "-c", code, *args], check=True, env=env, stdout=subprocess.DEVNULL)  # noqa: S603
+
+        run(_MAIN_LAZY, "-t", "plugin-0", script)
+        number = 30
+        print("30 plugins:")
+        _report("eager plugins", timeit.timeit(lambda: run(_MAIN_EAGER, script), number=number), number)
+        _report("plugin index", timeit.timeit(lambda: run(_MAIN_LAZY, script), number=number), number)
+        _report(
+            "plugin index (plugin)",
+            timeit.timeit(lambda: run(_MAIN_LAZY, "-t", "plugin-0", script), number=number),
+            number,
+        )
+
+
+def _peak_memory(function: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _render_materialized(paths: list[str], output: str) -> None:
+    # The former behavior of `main`: parse every input, then join all rendered outputs.
+    docs = read_files(paths)
+    contents = "\n\n\n".join(_render(templates["wikipage"], doc) for doc in docs)
+    with open(output, "w", encoding="utf-8") as file:
+        print(contents, file=file)
+
+
+def bench_pipeline_memory() -> None:
+    """Compare peak memory of materialized and streamed rendering of many inputs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for index in range(500):
+            path = os.path.join(tmpdir, f"script_{index}.sh")
+            _generate_script(path, 64 * 1024, doc_ratio=2)
+            paths.append(path)
+        output = os.path.join(tmpdir, "output.md")
+        materialized = _peak_memory(lambda: _render_materialized(paths, output))
+        streamed = _peak_memory(lambda: shellman_main(["-t", "wikipage", "-o", output, *paths]))
+        print(f"{len(paths)} inputs:")
+        print(f"  {'materialized':<24} {materialized / 1024 / 1024:10.2f} MiB")
+        print(f"  {'streamed':<24} {streamed / 1024 / 1024:10.2f} MiB")
+
+
+def _write_materialized(session: _RenderSession, doc: DocStream | MergedDoc, output: str) -> None:
+    # The former output of a single document: render the whole text, then print it.
+    with open(output, "w", encoding="utf-8") as file:
+        print(session.render(doc), file=file)
+
+
+def bench_render_stream() -> None:
+    """Compare peak memory and time of materialized and streamed output of a large merged wiki page."""
+    docs = [DocStream(io.StringIO(_function_doc_lines * 10), filename=f"script_{index}.sh") for index in range(500)]
+    doc = _merge(docs, "merged")
+    session = _RenderSession(templates["wikipage"])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        materialized = os.path.join(tmpdir, "materialized.md")
+        streamed = os.path.join(tmpdir, "streamed.md")
+        _write_materialized(session, doc, materialized)
+        _write(session.generate(doc), streamed)
+        _check_same(Path(materialized).read_bytes(), Path(streamed).read_bytes())
+        size = os.path.getsize(streamed)
+        print(f"{len(docs) * 10} functions, {size / 1024 / 1024:.2f} MiB output:")
+        memory = _peak_memory(lambda: _write_materialized(session, doc, materialized))
+        print(f"  {'peak (materialized)':<24} {memory / 1024 / 1024:10.2f} MiB")
+        memory = _peak_memory(lambda: _write(session.generate(doc), streamed))
+        print(f"  {'peak (streamed)':<24} {memory / 1024 / 1024:10.2f} MiB")
+        number = 3
+        _report(
+            "materialized",
+            timeit.timeit(lambda: _write_materialized(session, doc, materialized), number=number),
+            number,
+        )
+        _report("streamed", timeit.timeit(lambda: _write(session.generate(doc), streamed), number=number), number)
+
+
+async def _max_loop_lag(work: Callable[[], object]) -> tuple[float, float]:
+    # Run some work on the event loop while measuring the longest delay of a 1 ms heartbeat.
+    lag = 0.0
+    done = False
+
+    async def heartbeat() -> None:
+        nonlocal lag
+        loop = asyncio.get_running_loop()
+        while not done:
+            start = loop.time()
+            await asyncio.sleep(0.001)
+            lag = max(lag, loop.time() - start - 0.001)
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = timeit.default_timer()
+    result = work()
+    if asyncio.iscoroutine(result):
+        await result
+    elapsed = timeit.default_timer() - start
+    done = True
+    await task
+    return elapsed, lag
+
+
+async def _serve_async(paths: list[str]) -> list[str]:
+    # Like a service handling requests concurrently, a few at a time.
+    template = templates["helptext"]
+    semaphore = asyncio.Semaphore(4)
+
+    async def serve(path: str) -> str:
+        async with semaphore:
+            doc = await read_file_async(path, only_sections=template.doc_sections)
+            return await template.render_async(shellman={"doc": doc.sections, "filename": doc.filename})
+
+    return await asyncio.gather(*(serve(path) for path in paths))
+
+
+def bench_render_async() -> None:
+    """Compare event loop lag when serving many documents with sync and async reading and rendering."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for index in range(200):
+            path = os.path.join(tmpdir, f"script_{index}.sh")
+            _generate_script(path, 64 * 1024, doc_ratio=2)
+            paths.append(path)
+        template = templates["helptext"]
+        asyncio.run(_serve_async(paths[:1]))
+
+        def serve_sync() -> list[str]:
+            return [_render(template, DocFile(path, only_sections=template.doc_sections)) for path in paths]
+
+        print(f"{len(paths)} documents:")
+        for name, work in (("sync", serve_sync), ("async", lambda: _serve_async(paths))):
+            elapsed, lag = asyncio.run(_max_loop_lag(work))
+            print(f"  {name:<24} {elapsed * 1000:10.2f} ms, max loop lag {lag * 1000:.2f} ms")
+
+
+def _merge_copy(docs: list[DocFile], filename: str) -> DocStream:
+    # The former implementation of `_merge`, extending new lists with every section.
+    final_doc = DocStream(stream=[], filename=filename)
+    for doc in docs:
+        for section, values in doc.sections.items():
+            if section not in final_doc.sections:
+                final_doc.sections[section] = []
+            final_doc.sections[section].extend(values)
+    return final_doc
+
+
+def bench_merge() -> None:
+    """Compare merging documents by copying sections with the chained view, and rendering them."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for index in range(2000):
+            path = os.path.join(tmpdir, f"script_{index}.sh")
+            _generate_script(path, 4 * 1024, doc_ratio=2)
+            paths.append(path)
+        docs = read_files(paths)
+        template = templates["helptext"]
+        _check_same(_render(template, _merge_copy(docs, "merged")), _render(template, _merge(docs, "merged")))
+        number = 5
+        print(f"{len(docs)} inputs:")
+        _report("merge (copy)", timeit.timeit(lambda: _merge_copy(docs, "merged"), number=number), number)
+        _report("merge (view)", timeit.timeit(lambda: _merge(docs, "merged"), number=number), number)
+        _report(
+            "merge+render (copy)",
+            timeit.timeit(lambda: _render(template, _merge_copy(docs, "merged")), number=number),
+            number,
+        )
+        _report(
+            "merge+render (view)",
+            timeit.timeit(lambda: _render(template, _merge(docs, "merged")), number=number),
+            number,
+        )
+
+
+def _render_deepcopy(template: Template, doc: DocStream) -> str:
+    # The former rendering: version and date computed per document, base context deep-copied per render.
+    shellman = {
+        "doc": doc.sections,
+        "filename": doc.filename,
+        "filepath": doc.filepath,
+        "today": datetime.now(tz=timezone.utc).date(),
+        "version": debug._get_version(),
+    }
+    context = deepcopy(template.context)
+    context.update(shellman=shellman)
+    return template.template.render(**context).rstrip("\n")
+
+
+def bench_render_context() -> None:
+    """Compare deep-copied contexts with layered contexts and a render session, on many small documents."""
+    context = {
+        "indent": 2,
+        "project": {"name": "project", "links": [f"https://example.com/{index}" for index in range(50)]},
+        "labels": {f"label_{index}": {"text": f"Label {index}", "tags": ["a", "b"]} for index in range(200)},
+    }
+    template = Template(builtin_env, "usagetext", context=context)
+    docs = [DocStream(io.StringIO(f"## \\usage script_{index} [-h] FILE\n")) for index in range(10000)]
+    session = _RenderSession(template)
+    _check_same([_render_deepcopy(template, doc) for doc in docs], [session.render(doc) for doc in docs])
+    number = 3
+    print(f"{len(docs)} documents:")
+    _report(
+        "render (deepcopy)",
+        timeit.timeit(lambda: [_render_deepcopy(template, doc) for doc in docs], number=number),
+        number,
+    )
+    _report(
+        "render (layered, session)",
+        timeit.timeit(lambda: [session.render(doc) for doc in docs], number=number),
+        number,
+    )
+
+
+def _find_function_scan(doc: DocStream | MergedDoc, name: str) -> list[FunctionTag]:
+    # Linear scan of the functions section, like tools did before the index.
+    return [
+        tag
+        for tag in doc.sections["function"]
+        if isinstance(tag, FunctionTag) and _function_name(tag.prototype) == name
+    ]
+
+
+def _find_option_scan(doc: DocStream | MergedDoc, flag: str) -> list[OptionTag]:
+    return [tag for tag in doc.sections["option"] if isinstance(tag, OptionTag) and flag in (tag.short, tag.long)]
+
+
+def bench_index() -> None:
+    """Compare linear scans of sections with index lookups over a merged corpus."""
+    docs = [
+        DocStream(
+            io.StringIO(
+                "".join(
+                    f"## \\function func_{index}_{number}(arg)\n## \\option --opt-{index}-{number} VALUE\n"
+                    for number in range(20)
+                ),
+            ),
+        )
+        for index in range(2000)
+    ]
+    merged = _merge(docs, "merged")
+    names = [f"func_{index}_{index % 20}" for index in range(0, 2000, 10)]
+    flags = [f"--opt-{index}-{index % 20}" for index in range(0, 2000, 10)]
+    index = SectionIndex([merged])
+    _check_same([_find_function_scan(merged, name) for name in names], [index.function(name) for name in names])
+    _check_same([_find_option_scan(merged, flag) for flag in flags], [index.option(flag) for flag in flags])
+    number = 3
+    print(f"{len(docs)} inputs, {len(names) + len(flags)} lookups:")
+    _report(
+        "lookups (scan)",
+        timeit.timeit(
+            lambda: (
+                [_find_function_scan(merged, name) for name in names],
+                [_find_option_scan(merged, flag) for flag in flags],
+            ),
+            number=number,
+        ),
+        number,
+    )
+    _report("index build", timeit.timeit(lambda: SectionIndex([merged]), number=number), number)
+    _report(
+        "lookups (index)",
+        timeit.timeit(
+            lambda: ([index.function(name) for name in names], [index.option(flag) for flag in flags]),
+            number=number,
+        ),
+        number,
+    )
+
+
+BENCHMARKS: dict[str, Callable[[], None]] = {
+    "reader-mmap": bench_reader_mmap,
+    "reader-stream": bench_reader_stream,
+    "reader-shards": bench_reader_shards,
+    "buffer-edits": bench_buffer_edits,
+    "doc-lines": bench_doc_lines,
+    "tokenizer": bench_tokenizer,
+    "tags": bench_tags,
+    "import": bench_import,
+    "lazy-tags": bench_lazy_tags,
+    "header": bench_header,
+    "template-cache": bench_template_cache,
+    "precompiled": bench_precompiled,
+    "plugins": bench_plugins,
+    "pipeline-memory": bench_pipeline_memory,
+    "render-stream": bench_render_stream,
+    "render-async": bench_render_async,
+    "merge": bench_merge,
+    "index": bench_index,
+    "render-context": bench_render_context,
+}
+
+
+def main(args: list[str]) -> int:
+    for name in args or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            print(f"unknown benchmark '{name}', choose from: {', '.join(BENCHMARKS)}", file=sys.stderr)
+            return 1
+        print(f"### {name}")
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
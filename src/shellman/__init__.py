@@ -12,23 +12,34 @@ See https://jinja.palletsprojects.com/en/3.1.x/.
 
 from __future__ import annotations
 
+from shellman._internal.cache import ParseCache
 from shellman._internal.cli import get_parser, main
 from shellman._internal.context import DEFAULT_JSON_FILE, ENV_VAR_PREFIX
+from shellman._internal.discovery import DEFAULT_IGNORE
+from shellman._internal.index import SectionIndex
 from shellman._internal.reader import (
     DocBlock,
+    DocBuffer,
     DocFile,
     DocLine,
     DocStream,
     DocType,
+    MergedDoc,
+    iter_files,
+    read_file_async,
+    read_files,
+    read_files_async,
     tag_no_value_regex,
     tag_value_regex,
 )
 from shellman._internal.tags import (
     TAGS,
+    AppendField,
     AuthorTag,
     BriefTag,
     BugTag,
     CaveatTag,
+    ContinueField,
     CopyrightTag,
     DateTag,
     DescTag,
@@ -42,17 +53,21 @@ from shellman._internal.tags import (
     LicenseTag,
     NoteTag,
     OptionTag,
+    ParseField,
     SeealsoTag,
+    SetField,
     StderrTag,
     StdinTag,
     StdoutTag,
     Tag,
+    TagSchema,
     TextTag,
     UsageTag,
     ValueDescTag,
     VersionTag,
 )
 from shellman._internal.templates import (
+    TEMPLATE_CACHE_ENV_VAR,
     Template,
     builtin_env,
     helptext,
@@ -81,18 +96,23 @@ from shellman._internal.templates.filters import (
 )
 
 __all__: list[str] = [
+    "DEFAULT_IGNORE",
     "DEFAULT_JSON_FILE",
     "ENV_VAR_PREFIX",
     "FILTERS",
     "TAGS",
+    "TEMPLATE_CACHE_ENV_VAR",
+    "AppendField",
     "AuthorTag",
     "BriefTag",
     "BugTag",
     "CaveatTag",
+    "ContinueField",
     "CopyrightTag",
     "DateTag",
     "DescTag",
     "DocBlock",
+    "DocBuffer",
     "DocFile",
     "DocLine",
     "DocStream",
@@ -105,13 +125,19 @@ __all__: list[str] = [
     "FunctionTag",
     "HistoryTag",
     "LicenseTag",
+    "MergedDoc",
     "NoteTag",
     "OptionTag",
+    "ParseCache",
+    "ParseField",
+    "SectionIndex",
     "SeealsoTag",
+    "SetField",
     "StderrTag",
     "StdinTag",
     "StdoutTag",
     "Tag",
+    "TagSchema",
     "Template",
     "TextTag",
     "UsageTag",
@@ -134,9 +160,13 @@ __all__: list[str] = [
     "do_smartwrap",
     "get_parser",
     "helptext",
+    "iter_files",
     "main",
     "manpage",
     "manpage_md",
+    "read_file_async",
+    "read_files",
+    "read_files_async",
     "tag_no_value_regex",
     "tag_value_regex",
     "templates",
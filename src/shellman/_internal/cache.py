@@ -0,0 +1,237 @@
+# Persistent cache of parsed documentation sections.
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+from shellman._internal import debug
+from shellman._internal.tags import TAGS, _decode_sections, _encode_sections
+
+if TYPE_CHECKING:
+    from collections.abc import MutableMapping
+    from typing import Callable
+
+    from shellman._internal.tags import Tag
+
+_CACHE_FORMAT = "3"
+_ENTRY_SUFFIX = ".pickle"
+
+
+def _cache_version() -> str:
+    # Entries are invalidated when shellman's version or the tags registry change.
+    tags = ",".join(sorted(f"{name}={cls.__module__}.{cls.__qualname__}" for name, cls in TAGS.items()))
+    return hashlib.sha256(f"{_CACHE_FORMAT}:{debug._get_version()}:{tags}".encode()).hexdigest()
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """An on-disk cache of parsed documentation sections.
+
+    Entries are keyed by file path and decoding error policy, and validated with the file's
+    modification time and size, or with a hash of its contents when these changed.
+    """
+
+    def __init__(self, directory: str, max_size: int = 100 * 1024 * 1024) -> None:
+        """Initialize the cache.
+
+        Parameters:
+            directory: The directory to store entries in. It is created if needed.
+            max_size: The maximum size of the cache, in bytes.
+                The least recently used entries are evicted when the cache grows beyond this size.
+        """
+        self.directory = directory
+        """The directory storing entries."""
+        self.max_size = max_size
+        """The maximum size of the cache, in bytes."""
+        self.hits = 0
+        """The number of sections found in the cache."""
+        self.misses = 0
+        """The number of sections that had to be parsed."""
+        self._version = _cache_version()
+        self._size: int | None = None
+
+    def get_sections(
+        self,
+        path: str,
+        parse: Callable[[], MutableMapping[str, list[Tag]]],
+        *,
+        errors: str = "strict",
+        decode_errors: list[int] | None = None,
+    ) -> MutableMapping[str, list[Tag]]:
+        """Get the sections of a file from the cache, or parse and store them.
+
+        Parameters:
+            path: The file path.
+            parse: A function parsing the file, called on cache misses.
+            errors: The decoding error policy the file is parsed with. Each policy has its own entries.
+            decode_errors: The list `parse` records the numbers of undecodable lines in.
+                They are stored with the sections, and restored into the list on cache hits.
+
+        Returns:
+            The documentation sections.
+        """
+        abspath = os.path.abspath(path)
+        entry_path = self._entry_path(abspath, errors)
+        stat = os.stat(abspath)
+        digest = None
+        entry = self._load(entry_path, abspath, errors)
+        if entry is not None:
+            if decode_errors is not None:
+                decode_errors[:] = entry["decode_errors"]
+            if (entry["mtime"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                self.hits += 1
+                with contextlib.suppress(OSError):
+                    os.utime(entry_path)
+                return entry["sections"]
+            digest = _file_digest(abspath)
+            if entry["digest"] == digest:
+                self.hits += 1
+                self._store(
+                    entry_path,
+                    abspath,
+                    errors=errors,
+                    stat=stat,
+                    digest=digest,
+                    sections=entry["sections"],
+                    decode_errors=entry["decode_errors"],
+                )
+                return entry["sections"]
+        self.misses += 1
+        # Identify the file before parsing it, so that concurrent edits invalidate the entry.
+        digest = digest or _file_digest(abspath)
+        sections = parse()
+        self._store(
+            entry_path,
+            abspath,
+            errors=errors,
+            stat=stat,
+            digest=digest,
+            sections=sections,
+            decode_errors=decode_errors or [],
+        )
+        return sections
+
+    def _entry_path(self, abspath: str, errors: str) -> str:
+        key = hashlib.sha256(f"{self._version}\0{errors}\0{abspath}".encode()).hexdigest()
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def _load(self, entry_path: str, abspath: str, errors: str) -> dict[str, Any] | None:
+        try:
+            with open(entry_path, "rb") as file:
+                entry = pickle.load(file)  # noqa: S301
+        except FileNotFoundError:
+            return None
+        except Exception:  # noqa: BLE001
+            # Corrupted entries can fail in many ways (truncated data, huge sizes, wrong types): drop them.
+            self._remove(entry_path)
+            return None
+        if (
+            not isinstance(entry, dict)
+            or entry.get("version") != self._version
+            or entry.get("path") != abspath
+            or entry.get("errors") != errors
+        ):
+            return None
+        try:
+            entry = {
+                **entry,
+                "mtime": int(entry["mtime"]),
+                "size": int(entry["size"]),
+                "digest": str(entry["digest"]),
+                "decode_errors": [int(lineno) for lineno in entry["decode_errors"]],
+                "sections": _decode_sections(entry["sections"]),
+            }
+        except Exception:  # noqa: BLE001
+            self._remove(entry_path)
+            return None
+        return entry
+
+    def _remove(self, entry_path: str) -> None:
+        with contextlib.suppress(OSError):
+            size = os.path.getsize(entry_path)
+            os.remove(entry_path)
+            if self._size is not None:
+                self._size -= size
+
+    def _store(
+        self,
+        entry_path: str,
+        abspath: str,
+        *,
+        errors: str,
+        stat: os.stat_result,
+        digest: str,
+        sections: MutableMapping[str, list[Tag]],
+        decode_errors: list[int],
+    ) -> None:
+        try:
+            encoded = _encode_sections(sections)
+        except TypeError:
+            # Tags of custom classes that the compact format cannot encode are not cached.
+            self._remove(entry_path)
+            return
+        entry = {
+            "version": self._version,
+            "path": abspath,
+            "errors": errors,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            # Tags are stored in their compact binary format rather than pickled one by one.
+            "sections": encoded,
+            "decode_errors": list(decode_errors),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        # Entries are overwritten when files change: only count the difference in size.
+        previous_size = 0
+        with contextlib.suppress(OSError):
+            previous_size = os.path.getsize(entry_path)
+        # Write atomically, other processes could be reading or writing the same entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        if self._size is None:
+            self._size = self._disk_usage()
+        else:
+            self._size += os.path.getsize(entry_path) - previous_size
+        if self._size > self.max_size:
+            self._evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries if entry.name.endswith(_ENTRY_SUFFIX) and entry.is_file()]
+        except OSError:
+            return []
+
+    def _disk_usage(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if size <= self.max_size:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(entry.path)
+                size -= entry.stat().st_size
+        self._size = size
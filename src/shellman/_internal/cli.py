@@ -12,19 +12,27 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import os
 import re
+import stat
 import sys
+import tempfile
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any
+from itertools import chain, tee
+from typing import TYPE_CHECKING, Any, TextIO
 
 from shellman._internal import debug, templates
+from shellman._internal.cache import ParseCache
 from shellman._internal.context import DEFAULT_JSON_FILE, _get_context, _update
-from shellman._internal.reader import DocFile, DocStream, _merge
+from shellman._internal.discovery import DEFAULT_IGNORE, _discover, _has_magic, _read_files_from
+from shellman._internal.reader import _CHUNK_SIZE, DocFile, DocStream, _merge, iter_files
+from shellman._internal.tags import TAGS
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Collection, Iterable, Iterator, Sequence
 
+    from shellman._internal.reader import MergedDoc
     from shellman._internal.templates import Template
 
 
@@ -42,13 +50,21 @@ def _valid_file(value: str) -> str:
         return value
     if not value:
         raise argparse.ArgumentTypeError("'' is not a valid file path")
-    if not os.path.exists(value):
+    if not os.path.exists(value) and not _has_magic(value):
         raise argparse.ArgumentTypeError(f"{value} is not a valid file path")
-    if os.path.isdir(value):
-        raise argparse.ArgumentTypeError(f"{value} is a directory, not a regular file")
     return value
 
 
+def _valid_jobs(value: str) -> int:
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = -1
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a valid number of jobs, use 0 or a positive integer")
+    return jobs
+
+
 def get_parser() -> argparse.ArgumentParser:
     """Return the CLI argument parser.
 
@@ -85,7 +101,7 @@ def get_parser() -> argparse.ArgumentParser:
         help="the Jinja2 template to use. "
         'Prefix with "path:" to specify the path '
         "to a custom template. "
-        f"Available templates: {', '.join(templates._names())}",
+        "Available templates: %(choices)s",
     )
 
     parser.add_argument(
@@ -110,36 +126,202 @@ def get_parser() -> argparse.ArgumentParser:
         "(git and mercurial supported). "
         "They will be populated from each input file.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        default=None,
+        help="directory in which to cache parsed documentation. "
+        "Files that did not change since they were cached are not parsed again.",
+    )
+    parser.add_argument(
+        "--files-from",
+        dest="files_from",
+        default=None,
+        help="read input paths from a file, separated by NUL characters "
+        "(as printed by `find -print0`). Use - to read them on standard input.",
+    )
+
+    parser.add_argument(
+        "--ignore",
+        dest="ignore",
+        metavar="PATTERN",
+        action="append",
+        default=[],
+        help="file or directory name or relative path pattern to ignore when walking directories "
+        f"and expanding glob patterns. Can be repeated. Always ignored: {', '.join(DEFAULT_IGNORE)}.",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=_valid_jobs,
+        default=1,
+        help="number of processes to parse input files with. "
+        "Use 0 to use as many processes as there are CPUs (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--header-only",
+        dest="header_only",
+        action="store_true",
+        help="only read the documentation at the top of input files: "
+        "stop reading each file at its first line that is neither blank nor a comment.",
+    )
+    parser.add_argument(
+        "--max-header-lines",
+        dest="max_header_lines",
+        metavar="LINES",
+        type=int,
+        default=None,
+        help="stop reading input files after this number of lines. Implies --header-only.",
+    )
+    parser.add_argument(
+        "--max-header-bytes",
+        dest="max_header_bytes",
+        metavar="BYTES",
+        type=int,
+        default=None,
+        help="stop reading input files after this number of bytes. Implies --header-only.",
+    )
     parser.add_argument("-V", "--version", action="version", version=f"%(prog)s {debug._get_version()}")
     parser.add_argument("--debug-info", action=_DebugInfo, help="Print debug information.")
+    parser.add_argument(
+        "--debug-sections",
+        dest="debug_sections",
+        action="store_true",
+        help="print the documentation sections read by the template on standard error. "
+        "Other sections are skipped when parsing input files.",
+    )
 
     parser.add_argument(
         "FILE",
         type=_valid_file,
         nargs="*",
-        help="path to the file(s) to read. Use - to read on standard input.",
+        help="path to the file(s) to read. Use - to read on standard input. "
+        "Directories are searched recursively and glob patterns are expanded: "
+        "only shell scripts are read from them.",
     )
     return parser
 
 
-def _render(template: Template, doc: DocFile | DocStream | None = None, **context: dict) -> str:
-    shellman: dict[str, Any] = {"doc": {}}
-    if doc is not None:
-        shellman["doc"] = doc.sections
-        shellman["filename"] = doc.filename
-        shellman["filepath"] = doc.filepath
-    shellman["today"] = datetime.now(tz=timezone.utc).date()
-    shellman["version"] = debug._get_version()
-
-    if "shellman" in context:
-        _update(shellman, context.pop("shellman"))
-
-    return template.render(shellman=shellman, **context)
-
-
-def _write(contents: str, filepath: str) -> None:
-    with open(filepath, "w", encoding="utf-8") as write_stream:
-        print(contents, file=write_stream)
+class _RenderSession:
+    # Render documents with the same template and context.
+    # Values that do not change during a run, like the date and shellman's version,
+    # are computed once for all documents instead of once per document.
+
+    def __init__(self, template: Template, context: dict[str, Any] | None = None) -> None:
+        self.template = template
+        self.context = dict(context or {})
+        self.overrides = self.context.pop("shellman", None)
+        self.today = datetime.now(tz=timezone.utc).date()
+        self.version = debug._get_version()
+
+    def _shellman(self, doc: DocFile | DocStream | MergedDoc | None) -> dict[str, Any]:
+        shellman: dict[str, Any] = {"doc": {}}
+        if doc is not None:
+            shellman["doc"] = doc.sections
+            shellman["filename"] = doc.filename
+            shellman["filepath"] = doc.filepath
+        shellman["today"] = self.today
+        shellman["version"] = self.version
+
+        if self.overrides is not None:
+            _update(shellman, self.overrides)
+        return shellman
+
+    def render(self, doc: DocFile | DocStream | MergedDoc | None = None) -> str:
+        return self.template.render(shellman=self._shellman(doc), **self.context)
+
+    def generate(self, doc: DocFile | DocStream | MergedDoc | None = None) -> Iterator[str]:
+        return self.template.generate(shellman=self._shellman(doc), **self.context)
+
+
+def _render(template: Template, doc: DocFile | DocStream | MergedDoc | None = None, **context: dict) -> str:
+    return _RenderSession(template, context).render(doc)
+
+
+def _print_sections(sections: Collection[str] | None) -> None:
+    if sections is None:
+        print("shellman: debug: template reads sections dynamically, parsing all sections", file=sys.stderr)
+        return
+    pruned = sorted(name for name in TAGS if name is not None and name not in sections)
+    print(f"shellman: debug: template reads sections: {', '.join(sorted(sections)) or '(none)'}", file=sys.stderr)
+    print(f"shellman: debug: skipping sections: {', '.join(pruned) or '(none)'}", file=sys.stderr)
+
+
+def _write(chunks: Iterable[str], filepath: str) -> None:
+    # Same output as printing the joined chunks to the file, without building the whole string.
+    _write_file([chunks], filepath)
+
+
+def _file_mode(filepath: str) -> int:
+    # The permissions of the file if it exists, else the ones `open` would create it with.
+    try:
+        return stat.S_IMODE(os.stat(filepath).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_file(contents: Iterable[Iterable[str]], filepath: str) -> None:
+    # Contents are rendered while they are written: write them to a temporary file next to the output,
+    # and only replace the output once everything is written, so that errors never leave partial files.
+    directory = os.path.dirname(filepath) or os.curdir
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as write_stream:
+            _write_joined(contents, write_stream)
+        os.chmod(tmp_path, _file_mode(filepath))
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_joined(contents: Iterable[Iterable[str]], stream: TextIO) -> None:
+    # Same output as printing contents joined with blank lines, without building the whole string:
+    # each content is written chunk by chunk, as it is rendered.
+    for index, chunks in enumerate(contents):
+        if index:
+            stream.write("\n\n\n")
+        stream.writelines(chunks)
+    stream.write("\n")
+
+
+def _iter_docs(
+    files: Iterable[str],
+    output: str | None,
+    jobs: int,
+    cache: ParseCache | None,
+    only_sections: Collection[str] | None = None,
+    *,
+    header_only: bool = False,
+    max_header_lines: int | None = None,
+    max_header_bytes: int | None = None,
+) -> Iterator[DocFile | DocStream]:
+    # Files are discovered lazily, while previous ones are being parsed.
+    files, paths = tee(files)
+    docs = iter_files(
+        (file for file in paths if file != "-"),
+        jobs=jobs,
+        cache=cache,
+        only_sections=only_sections,
+        header_only=header_only,
+        max_header_lines=max_header_lines,
+        max_header_bytes=max_header_bytes,
+    )
+    for file in files:
+        if file == "-":
+            yield DocStream(
+                sys.stdin,
+                filename=_guess_filename(output or ""),
+                chunk_size=_CHUNK_SIZE,
+                only_sections=only_sections,
+            )
+        else:
+            yield next(docs)
 
 
 def _common_ancestor(docs: Sequence[DocFile | DocStream]) -> str:
@@ -171,7 +353,7 @@ def _guess_filename(output: str, docs: Sequence[DocFile | DocStream] | None = No
     return ""
 
 
-def _output_name_variables(doc: DocFile | DocStream | None = None) -> dict:
+def _output_name_variables(doc: DocFile | DocStream | MergedDoc | None = None) -> dict:
     if doc:
         basename, ext = os.path.splitext(doc.filename)
         abspath = os.path.abspath(doc.filepath or doc.filename)
@@ -220,19 +402,25 @@ def main(args: list[str] | None = None) -> int:
     Returns:
         An exit code.
     """
-    templates._load_plugin_templates()
-
     parser = get_parser()
     opts = parser.parse_args(args)
 
-    # Catch errors as early as possible
-    if opts.merge and len(opts.FILE) < 2:  # noqa: PLR2004
-        print(
-            "shellman: warning: --merge option is ignored with less than 2 inputs",
-            file=sys.stderr,
-        )
+    inputs = opts.FILE
+    if opts.files_from:
+        # Paths read from a file are checked like the ones passed as arguments
+        try:
+            files_from = _read_files_from(opts.files_from)
+        except OSError as error:
+            parser.error(f"argument --files-from: cannot read {opts.files_from}: {error.strerror}")
+        for path in files_from:
+            try:
+                _valid_file(path)
+            except argparse.ArgumentTypeError as error:
+                parser.error(f"argument --files-from: {error}")
+        inputs = [*inputs, *files_from]
 
-    if not opts.FILE and opts.output and _is_format_string(opts.output):
+    # Catch errors as early as possible
+    if not inputs and opts.output and _is_format_string(opts.output):
         parser.print_usage(file=sys.stderr)
         print(
             "shellman: error: cannot format output name without file inputs. "
@@ -245,49 +433,71 @@ def main(args: list[str] | None = None) -> int:
     if opts.template.startswith("path:"):
         template = templates._get_custom_template(opts.template[5:])
     else:
-        template = templates.templates[opts.template]
+        template = templates._get_template(opts.template)
 
     context = _get_context(opts)
 
     # Render template with context only
-    if not opts.FILE:
+    if not inputs:
         if not context:
             parser.print_usage(file=sys.stderr)
             print("shellman: error: please specify input file(s) or context", file=sys.stderr)
             return 1
-        contents = _render(template, None, **context)
+        chunks = _RenderSession(template, context).generate()
         if opts.output:
-            _write(contents, opts.output)
+            _write(chunks, opts.output)
         else:
-            print(contents)
+            _write_joined([chunks], sys.stdout)
         return 0
 
-    # Parse input files
-    docs: list[DocFile | DocStream] = []
-    for file in opts.FILE:
-        if file == "-":
-            docs.append(DocStream(sys.stdin, filename=_guess_filename(opts.output)))
-        else:
-            docs.append(DocFile(file))
+    # Only parse the sections that the template reads, when they can be found statically
+    only_sections = template.doc_sections
+    if opts.debug_sections:
+        _print_sections(only_sections)
+
+    # Parse input files lazily, so that each one can be rendered and released in turn
+    cache = ParseCache(opts.cache_dir) if opts.cache_dir else None
+    files: Iterable[str] = _discover(inputs, ignore=[*DEFAULT_IGNORE, *opts.ignore])
+
+    # Fail before creating any output when directories and patterns expand to nothing
+    first = next(iter(files), None)
+    if first is None:
+        print("shellman: error: no shell scripts found in inputs", file=sys.stderr)
+        return 1
+    files = chain([first], files)
+    docs: Iterable[DocFile | DocStream | MergedDoc]
+    header = {
+        "header_only": opts.header_only,
+        "max_header_lines": opts.max_header_lines,
+        "max_header_bytes": opts.max_header_bytes,
+    }
 
     # Optionally merge the parsed contents
     if opts.merge:
-        new_filename = _guess_filename(opts.output, docs)
-        docs = [_merge(docs, new_filename)]
+        all_docs = list(_iter_docs(files, opts.output, opts.jobs, cache, only_sections, **header))
+        # Count the files found, once directories and patterns are expanded
+        if len(all_docs) < 2:  # noqa: PLR2004
+            print(
+                "shellman: warning: --merge option is ignored with less than 2 inputs",
+                file=sys.stderr,
+            )
+        new_filename = _guess_filename(opts.output, all_docs)
+        docs = [_merge(all_docs, new_filename)]
+    else:
+        docs = _iter_docs(files, opts.output, opts.jobs, cache, only_sections, **header)
 
     # If opts.output contains variables, each input has its own output
+    session = _RenderSession(template, context)
     if opts.output and _is_format_string(opts.output):
         for doc in docs:
-            _write(
-                _render(template, doc, **context),
-                opts.output.format(**_output_name_variables(doc)),
-            )
-    # Else, concatenate contents (no effect if already merged), then output to file or stdout
+            _write(session.generate(doc), opts.output.format(**_output_name_variables(doc)))
+    # Else, concatenate contents (no effect if already merged), then output to file or stdout,
+    # writing rendered chunks as they come
     else:
-        contents = "\n\n\n".join(_render(template, doc, **context) for doc in docs)
+        rendered = (session.generate(doc) for doc in docs)
         if opts.output:
-            _write(contents, opts.output)
+            _write_file(rendered, opts.output)
         else:
-            print(contents)
+            _write_joined(rendered, sys.stdout)
 
     return 0
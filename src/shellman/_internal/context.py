@@ -5,6 +5,10 @@ from __future__ import annotations
 import contextlib
 import json
 import os
+from collections import ChainMap
+from collections.abc import Iterator, Mapping
+from copy import deepcopy
+from datetime import date, time, timedelta
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
@@ -77,3 +81,54 @@ def _update(base: dict, added: dict) -> dict:
         else:
             base[key] = value
     return base
+
+
+_IMMUTABLE_TYPES = (str, bytes, int, float, complex, type(None), date, time, timedelta, range)
+
+
+def _is_immutable(value: Any) -> bool:
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in value)
+    return False
+
+
+class _CopyOnRead(Mapping[str, Any]):
+    # A read-only view of a base context that returns private copies of its mutable values,
+    # so that templates never mutate the base context. Values are copied on first read,
+    # and only when they are read: immutable values are never copied.
+
+    __slots__ = ("_base", "_copies")
+
+    def __init__(self, base: Mapping[str, Any]) -> None:
+        self._base = base
+        self._copies: dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._copies:
+            return self._copies[key]
+        value = self._base[key]
+        if not _is_immutable(value):
+            value = self._copies[key] = deepcopy(value)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._base
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._base)
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+
+def _layered_context(
+    variables: dict[str, Any],
+    base: Mapping[str, Any],
+    globals: Mapping[str, Any],  # noqa: A002
+) -> ChainMap[str, Any]:
+    # Layer the variables of a single render over the base context of a template,
+    # itself protected by copy-on-read, and over the template globals, which Jinja never copies either.
+    # Lookups go through the layers in order, and writes only go to the variables.
+    return ChainMap(variables, _CopyOnRead(base), globals)  # type: ignore[arg-type]
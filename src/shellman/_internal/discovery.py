@@ -0,0 +1,127 @@
+# Discovery of input files in directories and glob patterns.
+
+from __future__ import annotations
+
+import fnmatch
+import glob
+import logging
+import os
+import re
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+DEFAULT_IGNORE = (".git", ".hg", ".svn", "node_modules")
+"""The file and directory names ignored by default when walking directories."""
+
+_logger = logging.getLogger(__name__)
+
+_SHELL_EXTENSIONS = frozenset((".sh", ".bash", ".dash", ".ksh", ".zsh", ".bats"))
+_SNIFF_SIZE = 1024
+_shebang_regex = re.compile(rb"#![^\n]*\b(?:a|ba|da|k|mk|z)?sh\b")
+
+
+def _has_magic(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def _ignore_regex(patterns: Iterable[str]) -> re.Pattern | None:
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _is_shell_file(path: str, name: str) -> bool:
+    # Decide on the extension first: files with another extension are not read.
+    # Files with a shell extension are only checked for binary contents (they will be read anyway),
+    # and files without an extension are kept if they start with a shell shebang.
+    extension = os.path.splitext(name)[1]
+    if extension and extension not in _SHELL_EXTENSIONS:
+        return False
+    try:
+        with open(path, "rb") as file:
+            head = file.read(_SNIFF_SIZE)
+    except OSError:
+        return False
+    if b"\0" in head:
+        return False
+    return bool(extension) or bool(_shebang_regex.match(head))
+
+
+def _is_ignored(ignore: re.Pattern, relative: str) -> bool:
+    # A path relative to a walked directory is ignored when a pattern matches
+    # one of its components, or the relative path of one of its parent directories or itself.
+    parts = relative.split(os.sep)
+    return any(ignore.match(part) or ignore.match(os.sep.join(parts[: index + 1])) for index, part in enumerate(parts))
+
+
+def _walk(root: str, ignore: re.Pattern | None) -> Iterator[str]:
+    # Depth-first walk in sorted order, using directory entries' cached types.
+    # Ignored directories are pruned, so only the entry itself is matched, like in `_is_ignored`.
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            if ignore and (ignore.match(entry.name) or ignore.match(os.path.relpath(entry.path, root))):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif entry.is_file() and _is_shell_file(entry.path, entry.name):
+                yield entry.path
+        stack.extend(reversed(subdirectories))
+
+
+def _glob_root(pattern: str) -> str:
+    # The directory a glob pattern starts from: its leading components without magic.
+    parts = pattern.split(os.sep)
+    index = next(index for index, part in enumerate(parts) if _has_magic(part))
+    if index == 1 and not parts[0]:
+        return os.sep
+    return os.sep.join(parts[:index]) or os.curdir
+
+
+def _read_files_from(path: str) -> list[str]:
+    if path == "-":
+        data = sys.stdin.buffer.read()
+    else:
+        with open(path, "rb") as file:
+            data = file.read()
+    return [os.fsdecode(item) for item in data.split(b"\0") if item]
+
+
+def _expand(path: str, ignore: re.Pattern | None) -> Iterator[str]:
+    # The shell scripts found in a directory, or matching a glob pattern.
+    if os.path.isdir(path):
+        yield from _walk(path, ignore)
+        return
+    root = _glob_root(path)
+    for match in sorted(glob.iglob(path, recursive=True)):
+        if ignore and _is_ignored(ignore, os.path.relpath(match, root)):
+            continue
+        if os.path.isfile(match) and _is_shell_file(match, os.path.basename(match)):
+            yield match
+
+
+def _discover(inputs: Iterable[str], ignore: Iterable[str] = DEFAULT_IGNORE) -> Iterator[str]:
+    # Explicit files (and "-") are yielded as is, directories are walked, and glob patterns expanded to files.
+    # Directories and patterns in which no shell script is found are reported with a warning.
+    ignore_regex = _ignore_regex(ignore)
+    for path in inputs:
+        if path != "-" and (os.path.isdir(path) or (_has_magic(path) and not os.path.exists(path))):
+            found = False
+            for match in _expand(path, ignore_regex):
+                found = True
+                yield match
+            if not found:
+                _logger.warning(f"No shell scripts found in {path}")
+        else:
+            yield path
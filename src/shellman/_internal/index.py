@@ -0,0 +1,195 @@
+# Index of documentation sections, to query tags by key.
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from shellman._internal.reader import DocBuffer, DocFile, DocStream, MergedDoc
+    from shellman._internal.tags import EnvTag, ExitTag, FunctionTag, OptionTag, Tag
+
+_function_name_regex = re.compile(r"^\s*(?:function\s+)?([^\s(){}]+)")
+
+
+def _function_name(prototype: str) -> str:
+    match = _function_name_regex.match(prototype)
+    return match.group(1) if match else prototype.strip()
+
+
+def _option_keys(tag: Any) -> tuple[str, ...]:
+    return tuple(flag for flag in (tag.short, tag.long) if flag)
+
+
+_KEYS: dict[str, Callable[[Any], tuple[str, ...]]] = {
+    "env": lambda tag: (tag.name,),
+    "exit": lambda tag: (tag.code,),
+    "function": lambda tag: (_function_name(tag.prototype),),
+    "option": _option_keys,
+}
+
+
+class _KeyIndex:
+    # Tags by key, with the sorted keys computed on demand for prefix queries.
+
+    __slots__ = ("_sorted", "tags")
+
+    def __init__(self) -> None:
+        self.tags: dict[str, list[Tag]] = {}
+        self._sorted: list[str] | None = None
+
+    def add(self, key: str, tag: Tag) -> None:
+        if key in self.tags:
+            self.tags[key].append(tag)
+        else:
+            self.tags[key] = [tag]
+            self._sorted = None
+
+    def keys(self) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.tags)
+        return self._sorted
+
+    def prefix(self, prefix: str) -> list[Tag]:
+        keys = self.keys()
+        found: dict[int, Tag] = {}
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            for tag in self.tags[key]:
+                # A tag can have several keys matching the prefix (`-h` and `--help`).
+                found.setdefault(id(tag), tag)
+        return list(found.values())
+
+
+class SectionIndex:
+    """An index of documentation sections, to find tags by key.
+
+    Options are indexed by their short and long flags, functions by the name
+    in their prototype, environment variables by name, and exit codes by code.
+    The index is built once, in a single pass over the sections of each document:
+    lookups are then dictionary lookups, and prefix queries use binary search on sorted keys.
+    """
+
+    def __init__(self, docs: Iterable[DocStream | DocFile | DocBuffer | MergedDoc] = ()) -> None:
+        """Initialize the index.
+
+        Parameters:
+            docs: The documents to index. Merged documents are indexed through their sections,
+                so their tags are not copied.
+        """
+        self._indexes = {section: _KeyIndex() for section in _KEYS}
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc: DocStream | DocFile | DocBuffer | MergedDoc) -> None:
+        """Add the sections of a document to the index.
+
+        Parameters:
+            doc: The document to index.
+        """
+        self.add_sections(doc.sections)
+
+    def add_sections(self, sections: Mapping[str, Sequence[Tag]]) -> None:
+        """Add documentation sections to the index.
+
+        Parameters:
+            sections: The documentation sections.
+        """
+        for section, index in self._indexes.items():
+            keys = _KEYS[section]
+            for tag in sections.get(section, ()):
+                for key in keys(tag):
+                    index.add(key, tag)
+
+    def get(self, section: str, key: str) -> list[Tag]:
+        """Get the tags of a section with the given key.
+
+        Parameters:
+            section: The section name: `env`, `exit`, `function` or `option`.
+            key: The key to look up.
+
+        Raises:
+            KeyError: When the section is not indexed.
+
+        Returns:
+            The matching tags, in document order (empty if none match).
+        """
+        return list(self._indexes[section].tags.get(key, ()))
+
+    def prefix(self, section: str, prefix: str) -> list[Tag]:
+        """Get the tags of a section with keys starting with a prefix.
+
+        Parameters:
+            section: The section name: `env`, `exit`, `function` or `option`.
+            prefix: The prefix of the keys.
+
+        Raises:
+            KeyError: When the section is not indexed.
+
+        Returns:
+            The matching tags, sorted by key, each tag appearing once.
+        """
+        return self._indexes[section].prefix(prefix)
+
+    def keys(self, section: str) -> list[str]:
+        """Get the sorted keys of a section.
+
+        Parameters:
+            section: The section name: `env`, `exit`, `function` or `option`.
+
+        Raises:
+            KeyError: When the section is not indexed.
+
+        Returns:
+            The sorted keys.
+        """
+        return list(self._indexes[section].keys())
+
+    def option(self, flag: str) -> list[OptionTag]:
+        """Get options by short or long flag.
+
+        Parameters:
+            flag: The flag, like `-h` or `--help`.
+
+        Returns:
+            The matching options.
+        """
+        return self.get("option", flag)  # type: ignore[return-value]
+
+    def function(self, name: str) -> list[FunctionTag]:
+        """Get functions by name.
+
+        Parameters:
+            name: The function name, as written in its prototype before arguments.
+
+        Returns:
+            The matching functions.
+        """
+        return self.get("function", name)  # type: ignore[return-value]
+
+    def env(self, name: str) -> list[EnvTag]:
+        """Get environment variables by name.
+
+        Parameters:
+            name: The variable name.
+
+        Returns:
+            The matching environment variables.
+        """
+        return self.get("env", name)  # type: ignore[return-value]
+
+    def exit(self, code: str | int) -> list[ExitTag]:
+        """Get exit codes by code.
+
+        Parameters:
+            code: The exit code.
+
+        Returns:
+            The matching exit codes.
+        """
+        return self.get("exit", str(code))  # type: ignore[return-value]
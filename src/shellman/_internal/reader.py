@@ -2,23 +2,35 @@
 #
 # Algorithm is as follows:
 #
-# 1. preprocess_stream: yield documentation lines.
+# 1. preprocess_stream: yield documentation lines
+#    (or preprocess_mmap/preprocess_chunks, which scan raw bytes).
 # 2. preprocess_lines: group documentation lines as blocks of documentation.
 # 3. process_blocks: tidy blocks by tag in a dictionary.
 
 
 from __future__ import annotations
 
+import io
 import logging
+import mmap
 import os
 import re
-from collections import defaultdict
-from typing import TYPE_CHECKING
+import stat
+import sys
+from bisect import bisect_left
+from collections import defaultdict, deque
+from collections.abc import MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice
+from typing import IO, TYPE_CHECKING, Any
 
 from shellman._internal.tags import TAGS, Tag
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Iterator, Sequence
+    from collections.abc import Collection, Iterable, Iterator
+
+    from shellman._internal.cache import ParseCache
 
 _logger = logging.getLogger(__name__)
 
@@ -27,6 +39,16 @@ tag_value_regex = re.compile(r"^\s*[\\@]([_a-zA-Z][\w-]*)\s+(.+)$")
 tag_no_value_regex = re.compile(r"^\s*[\\@]([_a-zA-Z][\w-]*)\s*$")
 """Regex to match a tag without a value."""
 
+_tag_regex = re.compile(r"^\s*[\\@]([_a-zA-Z][\w-]*)(?:\s+(.+)|\s*)$")
+
+_doc_candidate_regex = re.compile(rb"##[^\r\n]*")
+
+_CHUNK_SIZE = 1024 * 1024
+_MIN_SHARD_SIZE = 1024 * 1024
+_HINT_WINDOW = 8
+
+_Shard = tuple[int, list[tuple[int, str, str]], list[tuple[int, str, "Tag"]], list[int]]
+
 
 class DocType:
     """Enumeration of the possible types of documentation."""
@@ -44,9 +66,21 @@ class DocType:
     """Invalid type."""
 
 
+def _doc_type(tag: str, value: str | None) -> str:
+    if tag:
+        if value:
+            return DocType.TAG_VALUE
+        return DocType.TAG
+    if value is not None:
+        return DocType.VALUE
+    return DocType.INVALID
+
+
 class DocLine:
     """A documentation line."""
 
+    __slots__ = ("lineno", "path", "tag", "value")
+
     def __init__(self, path: str, lineno: int, tag: str | None, value: str) -> None:
         """Initialize the doc line.
 
@@ -56,11 +90,12 @@ class DocLine:
             tag: The line's tag, if any.
             value: The line's value.
         """
-        self.path = path
+        # Paths and tags are repeated on many lines: intern them to share a single string.
+        self.path = sys.intern(path)
         """The origin file path."""
         self.lineno = lineno
         """The line number in the file."""
-        self.tag = tag or ""
+        self.tag = sys.intern(tag) if tag else ""
         """The line's tag."""
         self.value = value
         """The line's value."""
@@ -80,18 +115,16 @@ class DocLine:
     @property
     def doc_type(self) -> str:
         """The line's doc type."""
-        if self.tag:
-            if self.value:
-                return DocType.TAG_VALUE
-            return DocType.TAG
-        if self.value is not None:
-            return DocType.VALUE
-        return DocType.INVALID
+        # Not cached: invalidating a cache when the tag or value change needs a `__setattr__` hook,
+        # which makes building lines several times slower (see the `doc-lines` benchmark).
+        return _doc_type(self.tag, self.value)
 
 
 class DocBlock:
     """A documentation block."""
 
+    __slots__ = ("lines",)
+
     def __init__(self, lines: list[DocLine] | None = None) -> None:
         """Initialize the doc block.
 
@@ -162,43 +195,668 @@ class DocBlock:
 class DocStream:
     """A stream of shell code or documentation."""
 
-    def __init__(self, stream: Iterable[str], filename: str = "") -> None:
+    def __init__(
+        self,
+        stream: Iterable[str] | IO[bytes],
+        filename: str = "",
+        *,
+        chunk_size: int | None = None,
+        only_sections: Collection[str] | None = None,
+    ) -> None:
         """Initialize the documentation file.
 
         Parameters:
-            stream: A text stream.
+            stream: A text stream, or a binary stream when reading by chunks.
             filename: An optional file name.
+            chunk_size: When set, read the underlying binary stream by chunks of this size,
+                and only decode documentation lines. Text streams are read through their buffer.
+                Text streams without a buffer, like `io.StringIO`, are read line by line.
+            only_sections: The names of the sections to keep. Blocks of other sections are dropped
+                without building their tags. By default, all sections are kept.
         """
         self.filepath = None
         """The file path."""
         self.filename = filename
         """The file name."""
-        self.sections = _process_blocks(_preprocess_lines(_preprocess_stream(stream)))
+        binary = _binary_stream(stream) if chunk_size else None
+        if chunk_size and binary is not None:
+            lines = _preprocess_chunks(
+                binary,
+                name=getattr(stream, "name", ""),
+                encoding=getattr(stream, "encoding", None) or "utf-8",
+                errors=getattr(stream, "errors", None) or "strict",
+                chunk_size=chunk_size,
+            )
+        else:
+            lines = _preprocess_stream(stream)  # type: ignore[arg-type]
+        self.sections: MutableMapping[str, list[Tag]] = _process_blocks(_preprocess_lines(lines), only_sections)
         """The documentation sections."""
 
 
 class DocFile:
     """A shell script or documentation file."""
 
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        *,
+        use_mmap: bool = False,
+        cache: ParseCache | None = None,
+        lazy: bool = False,
+        shards: int = 1,
+        errors: str = "strict",
+        only_sections: Collection[str] | None = None,
+        header_only: bool = False,
+        max_header_lines: int | None = None,
+        max_header_bytes: int | None = None,
+    ) -> None:
         """Initialize the documentation file.
 
         Parameters:
             path: The path to the file.
+            use_mmap: Whether to memory-map the file and only decode documentation lines,
+                instead of decoding and iterating on every line of the file.
+            cache: A parse cache to get sections from, or to store them into.
+            lazy: Whether to parse the file only when its sections are first accessed.
+            shards: The number of worker processes to scan the file with.
+                The file is split into byte ranges at line boundaries, scanned in parallel,
+                and documentation blocks are grouped like when reading the whole file at once.
+                Files smaller than a megabyte per shard are split into less shards.
+            errors: How to handle documentation lines that cannot be decoded as UTF-8,
+                as in [`bytes.decode`][]. With `"strict"`, the file's sections are left empty.
+                The file is read as bytes and only documentation lines are decoded,
+                so undecodable content outside of documentation (binary heredocs, etc.) is always ignored.
+            only_sections: The names of the sections to keep. Blocks of other sections are dropped
+                without building their tags. By default, all sections are kept.
+                Cached entries always hold all sections.
+            header_only: Whether to only read the documentation at the top of the file,
+                stopping at the first line that is neither blank nor a comment.
+                Reading time then depends on the length of the header, not of the file.
+                The cache, memory-mapping and shards are not used in this mode.
+            max_header_lines: Also stop reading after this number of lines. Implies `header_only`.
+            max_header_bytes: Also stop reading after this number of bytes. Implies `header_only`.
         """
         self.filepath = path
         """The file path."""
         self.filename = os.path.basename(path)
         """The file name."""
+        self._use_mmap = use_mmap
+        self._cache = cache
+        self._shards = shards
+        self._errors = errors
+        self._only_sections = only_sections
+        self._header: tuple[int | None, int | None] | None = None
+        if header_only or max_header_lines is not None or max_header_bytes is not None:
+            self._header = (max_header_lines, max_header_bytes)
+        self._sections: MutableMapping[str, list[Tag]] | None = None
+        self.decode_errors: list[int] = []
+        """The numbers of the documentation lines that could not be decoded."""
+        if not lazy:
+            self._sections = self._read()
+
+    @property
+    def sections(self) -> MutableMapping[str, list[Tag]]:
+        """The documentation sections."""
+        if self._sections is None:
+            self._sections = self._read()
+        return self._sections
+
+    @sections.setter
+    def sections(self, sections: MutableMapping[str, list[Tag]]) -> None:
+        self._sections = sections
+
+    def has_docs(self) -> bool:
+        """Tell whether the file contains documentation, without parsing it.
+
+        The file is scanned until the first documentation line only.
+
+        Returns:
+            Whether the file contains at least one documentation line.
+        """
+        if self._sections is not None:
+            return bool(self._sections)
+        with open(self.filepath, "rb") as file:
+            file_stat = os.fstat(file.fileno())
+            if not stat.S_ISREG(file_stat.st_mode):
+                return next(_preprocess_chunks(file, errors="replace"), None) is not None
+            if file_stat.st_size == 0:
+                return False
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return next(_scan_doc_lines(data), None) is not None
+
+    def _parse(self, only_sections: Collection[str] | None = None) -> MutableMapping[str, list[Tag]]:
+        self.decode_errors.clear()
+        if self._header is not None:
+            with open(self.filepath, "rb") as file:
+                lines = _preprocess_header(
+                    file,
+                    self.filepath,
+                    *self._header,
+                    self._errors,
+                    failures=self.decode_errors,
+                )
+                return _process_blocks(_preprocess_lines(lines), only_sections)
+        if self._shards > 1:
+            sections = _parse_shards(self.filepath, self._shards, self._errors, self.decode_errors)
+            return _prune_sections(sections, only_sections)
+        if self._use_mmap:
+            lines = _preprocess_mmap(self.filepath, self._errors, self.decode_errors)
+        else:
+            lines = _preprocess_file(self.filepath, self._errors, self.decode_errors)
+        return _process_blocks(_preprocess_lines(lines), only_sections)
+
+    def _read(self) -> MutableMapping[str, list[Tag]]:
+        try:
+            if self._cache is not None and self._header is None:
+                # Cache entries are shared by all templates: store every section, and prune them afterwards.
+                sections = self._cache.get_sections(
+                    self.filepath,
+                    self._parse,
+                    errors=self._errors,
+                    decode_errors=self.decode_errors,
+                )
+                return _prune_sections(sections, self._only_sections)
+            return self._parse(self._only_sections)
+        except UnicodeDecodeError:
+            where = f": line {self.decode_errors[0]}" if self.decode_errors else ""
+            _logger.error(f"Cannot decode file {self.filepath}{where}")  # noqa: TRY400
+            return {}
+        finally:
+            if self.decode_errors and self._errors != "strict":
+                lines = ", ".join(str(lineno) for lineno in self.decode_errors)
+                _logger.warning(f"Cannot decode documentation lines of file {self.filepath}: {lines}")
+
+
+class DocBuffer:
+    """An editable shell script or documentation file, parsed incrementally.
+
+    The buffer keeps the line at which each documentation block starts.
+    When lines are edited, only the blocks around the edited lines
+    are grouped and parsed again, and sections are patched in place.
+
+    Lines after an edit are not renumbered right away: blocks after the edit are shifted lazily,
+    and the shift is applied to the blocks between two edits when the next edit happens elsewhere.
+    An edit therefore costs the lines and blocks it changes, the blocks between it and the previous edit,
+    and finding the changed tags in their sections: a few comparisons near the tags changed by the previous edit,
+    or a search of the whole sections, in C and without Python calls per tag.
+    """
+
+    def __init__(self, lines: Iterable[str], filename: str = "", filepath: str | None = None) -> None:
+        """Initialize the buffer.
+
+        Parameters:
+            lines: The text lines, with or without their line endings.
+            filename: An optional file name.
+            filepath: An optional file path.
+        """
+        self.filepath = filepath
+        """The file path."""
+        self.filename = filename
+        """The file name."""
+        self.lines = [line.rstrip("\n") for line in lines]
+        """The text lines."""
         self.sections: dict[str, list[Tag]] = {}
         """The documentation sections."""
+        self._starts: list[int] = []
+        self._blocks: list[tuple[str, Tag]] = []
+        # Starts of blocks from index `_shift_from` are off by `_shift` lines.
+        self._shift_from = 0
+        self._shift = 0
+        # Index in each section of the tags patched by the last edit, where the next edit likely patches tags.
+        self._hints: dict[str, int] = {}
+        for block in _preprocess_lines(self._doc_lines(0)):
+            self._append_block(block)
 
+    @classmethod
+    def from_file(cls, path: str) -> DocBuffer:
+        """Read a buffer from a file.
+
+        Parameters:
+            path: The path to the file.
+
+        Returns:
+            A buffer.
+        """
         with open(path, encoding="utf-8") as stream:
-            try:
-                self.sections = _process_blocks(_preprocess_lines(_preprocess_stream(stream)))
-            except UnicodeDecodeError:
-                _logger.error(f"Cannot read file {path}")  # noqa: TRY400
-                self.sections = {}
+            return cls(stream, filename=os.path.basename(path), filepath=path)
+
+    def edit(self, start: int, stop: int, lines: Sequence[str]) -> None:
+        """Replace lines and update sections.
+
+        Parameters:
+            start: The index of the first replaced line (starting at 0).
+            stop: The index after the last replaced line, like in `buffer.lines[start:stop]`.
+            lines: The new lines.
+        """
+        delta = len(lines) - (stop - start)
+        self.lines[start:stop] = [line.rstrip("\n") for line in lines]
+
+        # Group lines again from the last block starting before the edit, which could be continued by new lines,
+        # until a block starts after the edit where an old block started: following blocks are unchanged.
+        first = self._find(start) - 1
+        if first < 0:
+            first, from_line = 0, 0
+        else:
+            from_line = self._start(first)
+        resume = len(self._starts)
+        new_starts: list[int] = []
+        new_blocks: list[tuple[str, Tag]] = []
+        for block in _preprocess_lines(self._doc_lines(from_line)):
+            block_start = block.lineno - 1
+            if block_start >= start + len(lines):
+                index = self._find(block_start - delta)
+                if index < len(self._starts) and self._start(index) == block_start - delta:
+                    resume = index
+                    break
+            new_starts.append(block_start)
+            new_blocks.append(_process_block(block))
+
+        self._patch_sections(first, resume, new_blocks)
+        self._shift_blocks(first, resume, len(new_starts), delta)
+        self._starts[first:resume] = new_starts
+        self._blocks[first:resume] = new_blocks
+
+    def _start(self, index: int) -> int:
+        return self._starts[index] + (self._shift if index >= self._shift_from else 0)
+
+    def _find(self, line: int) -> int:
+        # Like `bisect_left` on the actual starts: stored starts are sorted on both sides of the shift.
+        index = bisect_left(self._starts, line, 0, self._shift_from)
+        if index < self._shift_from:
+            return index
+        return bisect_left(self._starts, line - self._shift, self._shift_from)
+
+    def _shift_blocks(self, first: int, resume: int, count: int, delta: int) -> None:
+        # Blocks from `resume` move by `delta` lines, and their index by the number of added blocks.
+        # Keep a single lazy shift: apply the pending one, or the new one, to the blocks in between.
+        starts = self._starts
+        shift_from, shift = self._shift_from, self._shift
+        if shift and shift_from < first:
+            starts[shift_from:first] = [block_start + shift for block_start in starts[shift_from:first]]
+        elif shift and shift_from > resume:
+            starts[resume:shift_from] = [block_start + delta for block_start in starts[resume:shift_from]]
+            self._shift_from = shift_from + count - (resume - first)
+            self._shift = shift + delta
+            return
+        self._shift_from = first + count
+        self._shift = shift + delta
+
+    def _doc_lines(self, first: int) -> Iterator[tuple[str, int, str]]:
+        path = self.filepath or ""
+        for index in range(first, len(self.lines)):
+            line = self.lines[index].lstrip(" \t")
+            if line.startswith("##"):
+                yield path, index + 1, line
+
+    def _append_block(self, block: DocBlock) -> None:
+        name, tag = _process_block(block)
+        self._starts.append(block.lineno - 1)
+        self._blocks.append((name, tag))
+        self.sections.setdefault(name, []).append(tag)
+
+    def _patch_sections(self, first: int, resume: int, new_blocks: list[tuple[str, Tag]]) -> None:
+        removed: dict[str, list[Tag]] = defaultdict(list)
+        for name, tag in self._blocks[first:resume]:
+            removed[name].append(tag)
+        added: dict[str, list[Tag]] = defaultdict(list)
+        for name, tag in new_blocks:
+            added[name].append(tag)
+        for name in removed.keys() | added.keys():
+            section = self.sections.setdefault(name, [])
+            if removed[name]:
+                # Removed tags of a section are contiguous: blocks in between were also removed.
+                index = _index_of(section, removed[name][0], self._hints.get(name, 0))
+                section[index : index + len(removed[name])] = added[name]
+            else:
+                index = 0
+                for previous in range(first - 1, -1, -1):
+                    previous_name, previous_tag = self._blocks[previous]
+                    if previous_name == name:
+                        index = _index_of(section, previous_tag, self._hints.get(name, 0)) + 1
+                        break
+                section[index:index] = added[name]
+            self._hints[name] = index
+            if not section:
+                del self.sections[name]
+                del self._hints[name]
+
+
+def _index_of(tags: list[Tag], tag: Tag, hint: int) -> int:
+    # Tags are compared by identity: equal tags can appear several times in a section.
+    # Look around the hint first, then search the whole section.
+    for index in range(max(hint - _HINT_WINDOW, 0), min(hint + _HINT_WINDOW, len(tags))):
+        if tags[index] is tag:
+            return index
+    return list(map(id, tags)).index(id(tag))
+
+
+class _LazySections(MutableMapping):
+    # A mapping of section names to tags, holding the raw blocks of each section
+    # until the section is first accessed: tags are then built and kept.
+    # Tag classes are resolved when blocks are grouped, like when building tags right away.
+
+    __slots__ = ("_pending", "_sections")
+
+    def __init__(self, blocks: dict[str, list[DocBlock]]) -> None:
+        self._sections: dict[str, list[Any]] = dict(blocks)
+        self._pending = {name: TAGS.get(name, TAGS[None]) for name in blocks}
+
+    def __getitem__(self, name: str) -> list[Tag]:
+        tags = self._sections[name]
+        if name in self._pending:
+            tag_class = self._pending.pop(name)
+            tags = self._sections[name] = [tag_class.from_lines(block.lines) for block in tags]
+        return tags
+
+    def __setitem__(self, name: str, tags: list[Tag]) -> None:
+        self._sections[name] = tags
+        self._pending.pop(name, None)
+
+    def __delitem__(self, name: str) -> None:
+        del self._sections[name]
+        self._pending.pop(name, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sections
+
+    def __reduce__(self) -> tuple[type[dict], tuple[dict[str, list[Tag]]]]:
+        # Raw blocks do not cross process boundaries: tags are built and sent as a dictionary.
+        return dict, (dict(self.items()),)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _ChainedSection(Sequence):
+    # A read-only sequence of tags chaining the lists of the same section in several documents.
+
+    __slots__ = ("_lists",)
+
+    def __init__(self, lists: list[list[Tag]]) -> None:
+        self._lists = lists
+
+    def __len__(self) -> int:
+        return sum(map(len, self._lists))
+
+    def __bool__(self) -> bool:
+        return any(self._lists)
+
+    def __iter__(self) -> Iterator[Tag]:
+        return chain.from_iterable(self._lists)
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for tags in self._lists:
+                if index < len(tags):
+                    return tags[index]
+                index -= len(tags)
+        raise IndexError("section index out of range")
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _ChainedSections(MutableMapping):
+    # A mapping of section names to chained sections, in order of first appearance in the documents.
+    # Assigned items (from user context) shadow the documents' sections without modifying them.
+
+    __slots__ = ("_docs", "_hidden", "_index", "_overrides")
+
+    def __init__(self, docs: Sequence[DocStream | DocFile]) -> None:
+        self._docs = docs
+        self._index: dict[str, list[MutableMapping[str, list[Tag]]]] | None = None
+        self._overrides: dict[str, Any] = {}
+        self._hidden: set[str] = set()
+
+    @property
+    def _sections(self) -> dict[str, list[MutableMapping[str, list[Tag]]]]:
+        # Index the sections mappings by name only, so that lazy sections are not built.
+        if self._index is None:
+            index: dict[str, list[MutableMapping[str, list[Tag]]]] = {}
+            for doc in self._docs:
+                sections = doc.sections
+                for name in sections:
+                    index.setdefault(name, []).append(sections)
+            self._index = index
+        return self._index
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._overrides:
+            return self._overrides[name]
+        if name in self._hidden or name not in self._sections:
+            raise KeyError(name)
+        return _ChainedSection([sections[name] for sections in self._sections[name]])
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self._overrides[name] = value
+        self._hidden.discard(name)
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self:
+            raise KeyError(name)
+        self._overrides.pop(name, None)
+        self._hidden.add(name)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in self._sections:
+            if name not in self._hidden:
+                yield name
+        for name in self._overrides:
+            if name not in self._sections:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._overrides or (name not in self._hidden and name in self._sections)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class MergedDoc:
+    """A read-only view of several documents merged into one.
+
+    The sections of the merged document chain the sections of each document,
+    in order: tags are neither copied nor moved in new lists.
+    Getting the length of a section or iterating on it does not build any list;
+    indexing walks the per-document lists, and slicing builds a new list.
+    """
+
+    def __init__(self, docs: Sequence[DocStream | DocFile], filename: str = "") -> None:
+        """Initialize the merged document.
+
+        Parameters:
+            docs: The documents to merge.
+            filename: An optional file name.
+        """
+        self.docs = docs
+        """The merged documents."""
+        self.filepath = None
+        """The file path."""
+        self.filename = filename
+        """The file name."""
+        self.sections: MutableMapping[str, Sequence[Tag]] = _ChainedSections(docs)
+        """The documentation sections."""
+
+
+def iter_files(
+    paths: Iterable[str],
+    *,
+    jobs: int = 1,
+    use_mmap: bool = False,
+    cache: ParseCache | None = None,
+    only_sections: Collection[str] | None = None,
+    header_only: bool = False,
+    max_header_lines: int | None = None,
+    max_header_bytes: int | None = None,
+) -> Iterator[DocFile]:
+    """Iterate on documentation files, optionally read in parallel.
+
+    Files are read lazily: with several jobs, only a bounded number
+    of files are read ahead of the one being consumed.
+
+    Parameters:
+        paths: The paths to the files.
+        jobs: The number of worker processes to parse files with.
+            Use 0 to use as many processes as there are CPUs.
+        use_mmap: Whether to memory-map files (see [`DocFile`][shellman.DocFile]).
+        cache: A parse cache to get sections from, or to store them into.
+        only_sections: The names of the sections to keep (see [`DocFile`][shellman.DocFile]).
+        header_only: Whether to only read the documentation at the top of files (see [`DocFile`][shellman.DocFile]).
+        max_header_lines: The maximum number of lines to read. Implies `header_only`.
+        max_header_bytes: The maximum number of bytes to read. Implies `header_only`.
+
+    Yields:
+        The documentation files, in the same order as the given paths.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    read = partial(
+        _read_file,
+        use_mmap=use_mmap,
+        cache=cache,
+        only_sections=only_sections,
+        header_only=header_only,
+        max_header_lines=max_header_lines,
+        max_header_bytes=max_header_bytes,
+    )
+    if jobs == 1:
+        for path in paths:
+            yield read(path)[0]
+        return
+    remaining = iter(paths)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque(executor.submit(read, path) for path in islice(remaining, jobs * 2))
+        while pending:
+            # Results come back in the order of paths, whatever the order in which workers finish.
+            doc, hits, misses = pending.popleft().result()
+            for path in islice(remaining, 1):
+                pending.append(executor.submit(read, path))
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
+            yield doc
+
+
+def read_files(
+    paths: Iterable[str],
+    *,
+    jobs: int = 1,
+    use_mmap: bool = False,
+    cache: ParseCache | None = None,
+    only_sections: Collection[str] | None = None,
+    header_only: bool = False,
+    max_header_lines: int | None = None,
+    max_header_bytes: int | None = None,
+) -> list[DocFile]:
+    """Read documentation files, optionally in parallel.
+
+    Parameters:
+        paths: The paths to the files.
+        jobs: The number of worker processes to parse files with.
+            Use 0 to use as many processes as there are CPUs.
+        use_mmap: Whether to memory-map files (see [`DocFile`][shellman.DocFile]).
+        cache: A parse cache to get sections from, or to store them into.
+        only_sections: The names of the sections to keep (see [`DocFile`][shellman.DocFile]).
+        header_only: Whether to only read the documentation at the top of files (see [`DocFile`][shellman.DocFile]).
+        max_header_lines: The maximum number of lines to read. Implies `header_only`.
+        max_header_bytes: The maximum number of bytes to read. Implies `header_only`.
+
+    Returns:
+        The documentation files, in the same order as the given paths.
+    """
+    return list(
+        iter_files(
+            paths,
+            jobs=jobs,
+            use_mmap=use_mmap,
+            cache=cache,
+            only_sections=only_sections,
+            header_only=header_only,
+            max_header_lines=max_header_lines,
+            max_header_bytes=max_header_bytes,
+        ),
+    )
+
+
+async def read_file_async(path: str, **kwargs: Any) -> DocFile:
+    """Read a documentation file in a worker thread, without blocking the event loop.
+
+    Parameters:
+        path: The path to the file.
+        **kwargs: Keyword arguments passed to [`DocFile`][shellman.DocFile].
+            Files are always read before being returned, never lazily.
+
+    Raises:
+        ValueError: When `lazy=True` is passed.
+
+    Returns:
+        The documentation file.
+    """
+    import asyncio  # noqa: PLC0415
+
+    if kwargs.pop("lazy", False):
+        raise ValueError("files read asynchronously cannot be lazy")
+    return await asyncio.to_thread(partial(DocFile, path, lazy=False, **kwargs))
+
+
+async def read_files_async(paths: Iterable[str], **kwargs: Any) -> list[DocFile]:
+    """Read documentation files concurrently, in worker threads, without blocking the event loop.
+
+    Parameters:
+        paths: The paths to the files.
+        **kwargs: Keyword arguments passed to [`DocFile`][shellman.DocFile].
+
+    Returns:
+        The documentation files, in the same order as the given paths.
+    """
+    import asyncio  # noqa: PLC0415
+
+    return list(await asyncio.gather(*(read_file_async(path, **kwargs) for path in paths)))
+
+
+def _read_file(
+    path: str,
+    *,
+    use_mmap: bool,
+    cache: ParseCache | None,
+    only_sections: Collection[str] | None = None,
+    header_only: bool = False,
+    max_header_lines: int | None = None,
+    max_header_bytes: int | None = None,
+) -> tuple[DocFile, int, int]:
+    # Worker processes get a copy of the cache: send its counters back with the parsed file.
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    doc = DocFile(
+        path,
+        use_mmap=use_mmap,
+        cache=cache,
+        only_sections=only_sections,
+        header_only=header_only,
+        max_header_lines=max_header_lines,
+        max_header_bytes=max_header_bytes,
+    )
+    if cache is not None:
+        return doc, cache.hits - hits, cache.misses - misses
+    return doc, 0, 0
 
 
 def _preprocess_stream(stream: Iterable[str]) -> Iterator[tuple[str, int, str]]:
@@ -209,44 +867,302 @@ def _preprocess_stream(stream: Iterable[str]) -> Iterator[tuple[str, int, str]]:
             yield name, lineno, line
 
 
+def _count_line_breaks(data: bytes) -> int:
+    # Same line breaks as universal newlines mode: "\n", "\r\n" and "\r".
+    return data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n")
+
+
+def _scan_doc_lines(data: bytes | mmap.mmap, lineno: int = 1) -> Iterator[tuple[int, bytes]]:
+    # Search "##" candidates in the raw bytes, keep those only preceded by blanks
+    # on their line, and count line breaks in bulk between kept lines.
+    pos = 0
+    for match in _doc_candidate_regex.finditer(data):  # type: ignore[call-overload]
+        start = match.start()
+        line_start = max(data.rfind(b"\n", pos, start), data.rfind(b"\r", pos, start)) + 1 or pos
+        if data[line_start:start].strip(b" \t"):
+            continue
+        lineno += _count_line_breaks(data[pos:line_start])
+        pos = line_start
+        yield lineno, match.group()
+
+
+def _decode_lines(
+    lines: Iterable[tuple[int, bytes]],
+    path: str,
+    encoding: str = "utf-8",
+    errors: str = "strict",
+    failures: list[int] | None = None,
+) -> Iterator[tuple[str, int, str]]:
+    # Decode lines one by one, recording the numbers of the lines that cannot be decoded strictly.
+    for lineno, line in lines:
+        try:
+            text = line.decode(encoding)
+        except UnicodeDecodeError:
+            if failures is not None:
+                failures.append(lineno)
+            if errors == "strict":
+                raise
+            text = line.decode(encoding, errors)
+        yield path, lineno, text
+
+
+def _preprocess_file(
+    path: str,
+    errors: str = "strict",
+    failures: list[int] | None = None,
+) -> Iterator[tuple[str, int, str]]:
+    with open(path, "rb") as file:
+        yield from _preprocess_chunks(file, name=path, errors=errors, failures=failures)
+
+
+def _preprocess_header(
+    stream: IO[bytes],
+    name: str = "",
+    max_lines: int | None = None,
+    max_bytes: int | None = None,
+    errors: str = "strict",
+    *,
+    failures: list[int] | None = None,
+) -> Iterator[tuple[str, int, str]]:
+    return _decode_lines(_scan_header(stream, max_lines, max_bytes), name, errors=errors, failures=failures)
+
+
+def _scan_header(stream: IO[bytes], max_lines: int | None, max_bytes: int | None) -> Iterator[tuple[int, bytes]]:
+    # Read lines until the first line of code, or until a budget is exhausted, and yield documentation lines.
+    # `readline` splits on line feeds only: `splitlines` also splits on carriage returns, like universal newlines.
+    lineno = 0
+    read = 0
+    while raw := stream.readline():
+        for line_with_end in raw.splitlines(keepends=True):
+            lineno += 1
+            read += len(line_with_end)
+            if (max_lines is not None and lineno > max_lines) or (max_bytes is not None and read > max_bytes):
+                return
+            line = line_with_end.rstrip(b"\r\n").lstrip(b" \t")
+            if line.startswith(b"##"):
+                yield lineno, line
+            elif line and not line.startswith(b"#"):
+                return
+
+
+def _preprocess_mmap(
+    path: str,
+    errors: str = "strict",
+    failures: list[int] | None = None,
+) -> Iterator[tuple[str, int, str]]:
+    with open(path, "rb") as file:
+        file_stat = os.fstat(file.fileno())
+        if not stat.S_ISREG(file_stat.st_mode):
+            # Pipes and other special files cannot be mapped.
+            yield from _preprocess_chunks(file, name=path, errors=errors, failures=failures)
+            return
+        if file_stat.st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _decode_lines(_scan_doc_lines(data), path, errors=errors, failures=failures)
+
+
+def _shard_ranges(path: str, shards: int) -> list[tuple[int, int]]:
+    # Split the file in byte ranges ending just after a line feed, so that no line spans two shards.
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        shards = min(shards, size // _MIN_SHARD_SIZE)
+        if shards < 2:  # noqa: PLR2004
+            return [(0, size)]
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ranges = []
+            start = 0
+            for index in range(1, shards):
+                end = data.find(b"\n", max(start, size * index // shards)) + 1 or size
+                if end > start:
+                    ranges.append((start, end))
+                    start = end
+            if start < size:
+                ranges.append((start, size))
+            return ranges
+
+
+def _scan_shard(path: str, start: int, end: int, errors: str) -> _Shard:
+    # Group lines of the shard as if no block was open before it: the caller fixes the first blocks up.
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = mapped[start:end]
+    failures: list[int] = []
+    doc_lines = _decode_lines(_scan_doc_lines(data), path, errors=errors, failures=failures)
+    lines: list[tuple[int, str, str]] = []
+    blocks: list[tuple[int, str, Tag]] = []
+    for block in _preprocess_lines(doc_lines):
+        blocks.append((len(lines), *_process_block(block)))
+        lines.extend((line.lineno, line.tag, line.value) for line in block.lines)
+    return _count_line_breaks(data), lines, blocks, failures
+
+
+def _shard_failures(path: str, start: int, end: int) -> list[int]:
+    failures: list[int] = []
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = mapped[start:end]
+    for _ in _decode_lines(_scan_doc_lines(data), path, errors="replace", failures=failures):
+        pass
+    return failures
+
+
+def _parse_shards(
+    path: str,
+    shards: int,
+    errors: str = "strict",
+    failures: list[int] | None = None,
+) -> MutableMapping[str, list[Tag]]:
+    ranges = _shard_ranges(path, shards)
+    if len(ranges) == 1:
+        return _process_blocks(_preprocess_lines(_preprocess_mmap(path, errors, failures)))
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        tasks = [executor.submit(_scan_shard, path, start, end, errors) for start, end in ranges]
+        results: list[_Shard] = []
+        offset = 0
+        for task in tasks:
+            try:
+                result = task.result()
+            except UnicodeDecodeError:
+                # The worker cannot tell which line failed in the file: find it again in this shard.
+                if failures is not None:
+                    start, end = ranges[len(results)]
+                    failures.extend(lineno + offset for lineno in _shard_failures(path, start, end))
+                raise
+            if failures is not None:
+                failures.extend(lineno + offset for lineno in result[3])
+            offset += result[0]
+            results.append(result)
+
+    sections: dict[str, list[Tag]] = defaultdict(list)
+    # The last block stays open, since the next shard can continue it.
+    # Its tag is built again only if lines were added to it.
+    open_lines: list[DocLine] = []
+    open_tag: tuple[str, Tag] | None = None
+    prefix = ""
+    offset = 0
+
+    def close_block() -> None:
+        name, tag = open_tag or _process_block(DocBlock(open_lines))
+        sections[name].append(tag)
+
+    for line_breaks, lines, blocks, _ in results:
+        starts = {start for start, _, _ in blocks}
+        index = 0
+        # Group the first lines again, as they could continue the open block,
+        # until a block starts where the worker also started one: grouping is the same from there.
+        while open_lines and index < len(lines):
+            lineno, line_tag, value = lines[index]
+            if line_tag and not line_tag.startswith(prefix):
+                if index in starts:
+                    break
+                close_block()
+                open_lines = []
+                prefix = line_tag + "-"
+            open_lines.append(DocLine(path, lineno + offset, line_tag, value))
+            open_tag = None
+            index += 1
+        if index < len(lines):
+            if open_lines:
+                close_block()
+            following = [block for block in blocks if block[0] >= index]
+            for _, name, tag in following[:-1]:
+                sections[name].append(tag)
+            last_start, name, tag = following[-1]
+            open_lines = [
+                DocLine(path, lineno + offset, line_tag, value) for lineno, line_tag, value in lines[last_start:]
+            ]
+            open_tag = (name, tag)
+            prefix = open_lines[0].tag + "-"
+        offset += line_breaks
+
+    if open_lines:
+        close_block()
+    return dict(sections)
+
+
+def _binary_stream(stream: Iterable[str] | IO[bytes]) -> IO[bytes] | None:
+    # The binary stream to read by chunks: the buffer of a text stream, or the stream itself if binary.
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        return buffer
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(stream, "mode", ""):
+        return stream  # type: ignore[return-value]
+    return None
+
+
+def _preprocess_chunks(
+    stream: IO[bytes],
+    name: str = "",
+    encoding: str = "utf-8",
+    errors: str = "strict",
+    chunk_size: int = _CHUNK_SIZE,
+    *,
+    failures: list[int] | None = None,
+) -> Iterator[tuple[str, int, str]]:
+    lineno = 1
+    carry = b""
+    while chunk := stream.read(chunk_size):
+        data = carry + chunk
+        # Only scan complete lines. A trailing "\r" could be the start of "\r\n", keep it for later.
+        end = max(data.rfind(b"\n"), data.rfind(b"\r", 0, len(data) - 1)) + 1
+        if end:
+            yield from _decode_lines(_scan_doc_lines(data[:end], lineno), name, encoding, errors, failures)
+            lineno += _count_line_breaks(data[:end])
+        # Keep memory bounded: leading blanks of the incomplete line are irrelevant,
+        # and a line that cannot be a documentation line is replaced by a placeholder.
+        head = data[end:].lstrip(b" \t")
+        if not b"##".startswith(head[:2]):
+            head = b"x\r" if head.endswith(b"\r") else b"x"
+        carry = head
+    yield from _decode_lines(_scan_doc_lines(carry, lineno), name, encoding, errors, failures)
+
+
+def _tokenize(line: str) -> tuple[str, str, str]:
+    # Single-pass equivalent of trying `tag_value_regex`, then `tag_no_value_regex`.
+    match = _tag_regex.match(line)
+    if match is None:
+        return DocType.VALUE, "", line
+    tag, value = match.groups()
+    if value is None:
+        return DocType.TAG, tag, ""
+    return DocType.TAG_VALUE, tag, value
+
+
 def _preprocess_lines(lines: Iterable[tuple[str, int, str]]) -> Iterator[DocBlock]:
     current_block = DocBlock()
+    continuation_prefix = ""
     for path, lineno, line in lines:
-        line = line[3:]  # noqa: PLW2901
-        res = tag_value_regex.search(line)
-        if res:
-            tag, value = res.groups()
-            if current_block and not tag.startswith(current_block.tag + "-"):
-                yield current_block
-                current_block = DocBlock()
-            current_block.append(DocLine(path, lineno, tag, value))
-        else:
-            res = tag_no_value_regex.search(line)
-            if res:
-                tag = res.groups()[0]
-                if current_block and not tag.startswith(current_block.tag + "-"):
-                    yield current_block
-                    current_block = DocBlock()
-                current_block.append(DocLine(path, lineno, tag, ""))
-            else:
-                current_block.append(DocLine(path, lineno, None, line))
+        doc_type, tag, value = _tokenize(line[3:])
+        if doc_type != DocType.VALUE and current_block and not tag.startswith(continuation_prefix):
+            yield current_block
+            current_block = DocBlock()
+        if not current_block:
+            continuation_prefix = tag + "-"
+        current_block.append(DocLine(path, lineno, tag, value))
     if current_block:
         yield current_block
 
 
-def _process_blocks(blocks: Iterable[DocBlock]) -> dict[str, list[Tag]]:
-    sections: dict[str, list[Tag]] = defaultdict(list)
+def _process_block(block: DocBlock) -> tuple[str, Tag]:
+    tag_class = TAGS.get(block.tag, TAGS[None])
+    return block.tag, tag_class.from_lines(block.lines)
+
+
+def _process_blocks(blocks: Iterable[DocBlock], only_sections: Collection[str] | None = None) -> _LazySections:
+    sections: dict[str, list[DocBlock]] = defaultdict(list)
     for block in blocks:
-        tag_class = TAGS.get(block.tag, TAGS[None])
-        sections[block.tag].append(tag_class.from_lines(block.lines))
-    return dict(sections)
+        if only_sections is None or block.tag in only_sections:
+            sections[block.tag].append(block)
+    return _LazySections(sections)
+
+
+def _prune_sections(
+    sections: MutableMapping[str, list[Tag]],
+    only_sections: Collection[str] | None,
+) -> MutableMapping[str, list[Tag]]:
+    if only_sections is None:
+        return sections
+    return {name: sections[name] for name in sections if name in only_sections}
 
 
-def _merge(docs: Sequence[DocStream | DocFile], filename: str) -> DocStream:
-    final_doc = DocStream(stream=[], filename=filename)
-    for doc in docs:
-        for section, values in doc.sections.items():
-            if section not in final_doc.sections:
-                final_doc.sections[section] = []
-            final_doc.sections[section].extend(values)
-    return final_doc
+def _merge(docs: Sequence[DocStream | DocFile], filename: str) -> MergedDoc:
+    return MergedDoc(docs, filename=filename)
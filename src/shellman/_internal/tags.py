@@ -5,9 +5,9 @@ from __future__ import annotations
 import re
 import sys
 import warnings
-from dataclasses import dataclass
-from functools import cached_property
-from typing import TYPE_CHECKING, Any, ClassVar
+from dataclasses import dataclass, field, fields, is_dataclass
+from types import MethodType
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Union
 
 # YORE: EOL 3.10: Replace block with line 4.
 if sys.version_info < (3, 11):
@@ -16,10 +16,13 @@ else:
     from typing import Self
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Mapping, Sequence
 
     from shellman._internal.reader import DocLine
 
+# YORE: EOL 3.9: Replace `**_slots` with `slots=True` within file.
+_slots: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 # YORE: Bump 2: Remove block.
 def __getattr__(name: str) -> Any:
@@ -29,11 +32,272 @@ def __getattr__(name: str) -> Any:
     raise AttributeError(f"module {__name__} has no attribute {name}")
 
 
+@dataclass(frozen=True)
+class SetField:
+    """A schema rule setting a field to the line's value. The last line wins.
+
+    On fields that other rules append to, the value is appended instead.
+    """
+
+    field: str
+    """The name of the field to set."""
+    continues: str | None = None
+    """The name of the (appended) field receiving the following lines, for [`ContinueField`][shellman.ContinueField]."""
+    skip_empty: bool = False
+    """Whether to ignore the line when its value is empty."""
+
+
+@dataclass(frozen=True)
+class AppendField:
+    """A schema rule appending the line's value to a field. The field is a tuple of strings."""
+
+    field: str
+    """The name of the field to append to."""
+    continues: str | None = None
+    """The name of the (appended) field receiving the following lines, for [`ContinueField`][shellman.ContinueField]."""
+    skip_empty: bool = False
+    """Whether to ignore the line when its value is empty."""
+
+
+@dataclass(frozen=True)
+class ParseField:
+    """A schema rule parsing the line's value into several fields.
+
+    Parsed values are appended to tuple fields, and set on the others.
+    """
+
+    parse: Callable[[str], Sequence[str]]
+    """A function returning the values of fields from the line's value.
+
+    Values are returned in the order of `fields`.
+    The function can return less values than fields: the remaining fields get no value from this line.
+    """
+    fields: tuple[str, ...]
+    """The names of the fields the function returns values for."""
+    continues: str | None = None
+    """The name of the (appended) field receiving the following lines, for [`ContinueField`][shellman.ContinueField]."""
+
+
+@dataclass(frozen=True)
+class ContinueField:
+    """A schema rule appending the line's value to the field continued by the previous sub-tag, if any."""
+
+
+_Rule = Union[SetField, AppendField, ParseField, ContinueField]
+
+
+@dataclass(frozen=True)
+class TagSchema:
+    """A declarative description of how to parse the lines of a tag.
+
+    Each line of a block is dispatched on its tag: the main tag and its sub-tags (`function-brief`, etc.)
+    get their own rules, and lines without tags or with unknown sub-tags get the default rule.
+    Fields appended to are tuples of strings, other fields are strings (empty by default).
+    """
+
+    rules: dict[str, _Rule]
+    """The rules of the main tag and sub-tags."""
+    default: _Rule = field(default_factory=ContinueField)
+    """The rule of lines without tags or with unknown sub-tags."""
+    joined: tuple[str, ...] = ()
+    """The appended fields to join with newlines into a single string."""
+
+
+_CONTINUE, _SET, _APPEND, _PARSE = range(4)
+
+
+def _rule_fields(rule: _Rule) -> tuple[str, ...]:
+    if isinstance(rule, ContinueField):
+        return ()
+    fields = rule.fields if isinstance(rule, ParseField) else (rule.field,)
+    return (*fields, rule.continues) if rule.continues else fields
+
+
+def _compile_rule(rule: _Rule) -> tuple[int, Any, str | None, bool]:
+    # Rules are compiled into tuples: kind, field or parsing function, continued field, skip empty values.
+    if isinstance(rule, SetField):
+        return _SET, rule.field, rule.continues, rule.skip_empty
+    if isinstance(rule, AppendField):
+        return _APPEND, rule.field, rule.continues, rule.skip_empty
+    if isinstance(rule, ParseField):
+        return _PARSE, rule, rule.continues, False
+    return _CONTINUE, None, None, False
+
+
+def _schema_fields(schema: TagSchema) -> tuple[list[str], set[str]]:
+    # The fields of a schema, in order of appearance, and the (appended) fields that are tuples.
+    all_rules = [*schema.rules.values(), schema.default]
+    list_fields = {rule.field for rule in all_rules if isinstance(rule, AppendField)}
+    list_fields.update(rule.continues for rule in all_rules if not isinstance(rule, ContinueField) and rule.continues)
+    fields = list(dict.fromkeys(name for rule in all_rules for name in _rule_fields(rule)))
+    return fields, list_fields
+
+
+def _compile_schema(schema: TagSchema) -> Callable[[type[Tag], Sequence[DocLine]], Tag]:
+    all_rules = [*schema.rules.values(), schema.default]
+    fields, list_fields = _schema_fields(schema)
+    joined = schema.joined
+
+    # Empty values are skipped line after line: other rules can still add empty values to the same fields.
+    if any(isinstance(rule, ContinueField) or getattr(rule, "skip_empty", False) for rule in all_rules):
+        return _compile_continued(schema)
+
+    # Lines are dispatched on their tag to a slot (a list) where their value is appended.
+    # Fields are then built from slots: set fields take their last value.
+    # Parsing rules are dispatched to the bitwise complement of their index. The values they return
+    # are appended to the slots of their fields, or kept as is for fields that only they set.
+    # Like dataclasses, the parser's source is generated, so that slots are local literals
+    # and the tag is built with keyword arguments.
+    parsers = list(dict.fromkeys(rule for rule in all_rules if isinstance(rule, ParseField)))
+    parsed_only = {
+        name: (number, position)
+        for number, rule in enumerate(parsers)
+        for position, name in enumerate(rule.fields)
+        if name not in list_fields and sum(name in _rule_fields(other) for other in all_rules) == 1
+    }
+    slot_index = {name: index for index, name in enumerate(name for name in fields if name not in parsed_only)}
+
+    def dispatch(rule: _Rule) -> int:
+        if isinstance(rule, ParseField):
+            return ~parsers.index(rule)
+        return slot_index[rule.field]  # type: ignore[union-attr]
+
+    actions = {tag: dispatch(rule) for tag, rule in schema.rules.items()}
+    default = dispatch(schema.default)
+
+    def build(name: str) -> str:
+        if name in parsed_only:
+            number, position = parsed_only[name]
+            return f"parsed_{number}[{position}] if len(parsed_{number}) > {position} else ''"
+        index = slot_index[name]
+        if name in list_fields:
+            return f"'\\n'.join(slots[{index}])" if name in joined else f"tuple(slots[{index}])"
+        return f"slots[{index}][-1] if slots[{index}] else ''"
+
+    body = [
+        "def from_lines(cls, lines):",
+        f"    slots = ({'[], ' * len(slot_index)})",
+        *(f"    parsed_{number} = ()" for number in range(len(parsers))),
+    ]
+    if not actions and isinstance(schema.default, AppendField) and len(fields) == 1 and fields[0] in joined:
+        # Text tags: every line goes to a single field.
+        body[1] = "    slots = ([line.value for line in lines],)"
+    elif parsers:
+        body += [
+            "    for line in lines:",
+            f"        index = get(line.tag, {default})",
+            "        if index >= 0:",
+            "            slots[index].append(line.value)",
+        ]
+        for number, rule in enumerate(parsers):
+            body += [
+                f"        elif index == {~number}:",
+                f"            values = parse_{number}(line.value)",
+            ]
+            if any(name in parsed_only for name in rule.fields):
+                # Fields only this rule sets keep their previous values when it returns less values.
+                body.append(f"            parsed_{number} = (*values, *parsed_{number}[len(values) :])")
+            body += [
+                f"            if len(values) > {position}:\n"
+                f"                slots[{slot_index[name]}].append(values[{position}])"
+                for position, name in enumerate(rule.fields)
+                if name not in parsed_only
+            ]
+    else:
+        body += [
+            "    for line in lines:",
+            f"        slots[get(line.tag, {default})].append(line.value)",
+        ]
+    body += [
+        "    return cls(" + ", ".join(f"{name}={build(name)}" for name in fields) + ")",
+    ]
+    namespace: dict[str, Any] = {"get": actions.get}
+    namespace.update((f"parse_{number}", rule.parse) for number, rule in enumerate(parsers))
+    exec("\n".join(body), namespace)  # noqa: S102
+    return namespace["from_lines"]
+
+
+def _compile_continued(schema: TagSchema) -> Callable[[type[Tag], Sequence[DocLine]], Tag]:
+    # Slower path for schemas with continued fields or skipped empty values, tracked line after line.
+    fields, list_fields = _schema_fields(schema)
+    str_fields = [name for name in fields if name not in list_fields]
+    joined = schema.joined
+
+    def compile_rule(rule: _Rule) -> tuple[int, Any, str | None, bool]:
+        # Fields that are appended to are tuples: setting them appends too.
+        kind, target, continues, skip_empty = _compile_rule(rule)
+        if kind == _SET and target in list_fields:
+            kind = _APPEND
+        return kind, target, continues, skip_empty
+
+    actions = {tag: compile_rule(rule) for tag, rule in schema.rules.items()}
+    default = compile_rule(schema.default)
+
+    def from_lines(cls: type[Tag], lines: Sequence[DocLine]) -> Tag:
+        values: dict[str, Any] = dict.fromkeys(str_fields, "")
+        lists: dict[str, list[str]] = {name: [] for name in list_fields}
+        current = None
+        for line in lines:
+            kind, target, continues, skip_empty = actions.get(line.tag, default)  # type: ignore[arg-type]
+            value = line.value
+            if kind == _CONTINUE:
+                if current is not None:
+                    lists[current].append(value)
+                continue
+            if kind == _PARSE:
+                for name, parsed in zip(target.fields, target.parse(value)):
+                    if name in lists:
+                        lists[name].append(parsed)
+                    else:
+                        values[name] = parsed
+            elif value or not skip_empty:
+                if kind == _APPEND:
+                    lists[target].append(value)
+                else:
+                    values[target] = value
+            current = continues
+        for name, values_list in lists.items():
+            values[name] = "\n".join(values_list) if name in joined else tuple(values_list)
+        return cls(**values)
+
+    return from_lines
+
+
+class _LazyFromLines:
+    # Schemas are compiled on first use rather than when tag classes are created, to keep imports fast.
+    # The descriptor is shared by slotted dataclasses and the classes they replace, so it compiles once.
+
+    def __init__(self, schema: TagSchema) -> None:
+        self.schema = schema
+        self.function: Callable[[type[Tag], Sequence[DocLine]], Tag] | None = None
+        self.__doc__ = Tag.from_lines.__doc__
+
+    def __get__(self, instance: Tag | None, owner: type[Tag]) -> Callable[[Sequence[DocLine]], Tag]:
+        if self.function is None:
+            self.function = _compile_schema(self.schema)
+        return MethodType(self.function, owner)
+
+
 class Tag:
-    """Base class for tags."""
+    """Base class for tags.
+
+    Subclasses can describe their lines with a [`TagSchema`][shellman.TagSchema]
+    instead of implementing [`from_lines`][shellman.Tag.from_lines]:
+    the schema is compiled into a `from_lines` method the first time it is called.
+    """
+
+    __slots__ = ()
+
+    schema: ClassVar[TagSchema | None] = None
+    """The schema describing how to parse the tag's lines."""
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("schema") is not None and "from_lines" not in cls.__dict__:
+            cls.from_lines = _LazyFromLines(cls.schema)  # type: ignore[assignment,arg-type]
 
     @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> Tag:
+    def from_lines(cls, lines: Sequence[DocLine]) -> Self:
         """Parse a sequence of lines into a tag instance.
 
         Parameters:
@@ -44,20 +308,160 @@ class Tag:
         """
         raise NotImplementedError
 
+    def __reduce_ex__(self, protocol: Any) -> str | tuple[Any, ...]:
+        # Pickle tags as their class and the values of their fields, without names.
+        # Tags that are not dataclasses with positional fields are pickled normally.
+        names = _init_fields(type(self))
+        if names is None:
+            return super().__reduce_ex__(protocol)
+        return type(self), tuple(getattr(self, name) for name in names)
+
+    def to_bytes(self) -> bytes:
+        """Encode the tag in a compact binary format.
+
+        Fields are encoded in order, as length-prefixed UTF-8 strings or sequences of strings.
+        The encoding does not contain the tag class: decode it with the same class.
+
+        Raises:
+            TypeError: When the tag is not a dataclass with positional fields,
+                or when one of its fields is not a string or a sequence of strings.
+
+        Returns:
+            The encoded tag.
+        """
+        out = bytearray()
+        _encode_tag(self, out)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Decode a tag encoded with [`to_bytes`][shellman.Tag.to_bytes].
+
+        Parameters:
+            data: The encoded tag.
+
+        Raises:
+            ValueError: When the data is not a valid encoding for this tag class.
+
+        Returns:
+            A tag instance.
+        """
+        try:
+            tag, offset = _decode_tag(cls, data, 0)
+        except (IndexError, UnicodeDecodeError, TypeError) as error:
+            raise ValueError(f"invalid encoding for {cls.__name__}") from error
+        if offset != len(data):
+            raise ValueError(f"invalid encoding for {cls.__name__}: trailing data")
+        return tag
+
+
+# Compact binary encoding of tags: unsigned LEB128 integers, and length-prefixed UTF-8 strings.
+# Each field starts with a type byte: a string, or a sequence of strings.
+_STR, _SEQUENCE = 0, 1
+_init_fields_cache: dict[type, tuple[str, ...] | None] = {}
+
+
+def _init_fields(cls: type) -> tuple[str, ...] | None:
+    # The fields passed positionally to build a tag, or `None` when tags cannot be built from them.
+    try:
+        return _init_fields_cache[cls]
+    except KeyError:
+        names = None
+        if is_dataclass(cls):
+            init_fields = [item for item in fields(cls) if item.init]
+            if not any(getattr(item, "kw_only", False) is True for item in init_fields):
+                names = tuple(item.name for item in init_fields)
+        _init_fields_cache[cls] = names
+        return names
+
+
+def _write_varint(out: bytearray, number: int) -> None:
+    while number >= 0x80:  # noqa: PLR2004
+        out.append((number & 0x7F) | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    number = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:  # noqa: PLR2004
+            return number, offset
+        shift += 7
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    encoded = value.encode("utf-8", "surrogatepass")
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_str(data: bytes, offset: int) -> tuple[str, int]:
+    size, offset = _read_varint(data, offset)
+    end = offset + size
+    if end > len(data):
+        raise IndexError(end)
+    return data[offset:end].decode("utf-8", "surrogatepass"), end
+
+
+def _encode_tag(tag: Tag, out: bytearray) -> None:
+    names = _init_fields(type(tag))
+    if names is None:
+        raise TypeError(f"cannot encode {type(tag).__name__}: not a dataclass with positional fields")
+    for name in names:
+        value = getattr(tag, name)
+        if isinstance(value, str):
+            out.append(_STR)
+            _write_str(out, value)
+        elif isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+            out.append(_SEQUENCE)
+            _write_varint(out, len(value))
+            for item in value:
+                _write_str(out, item)
+        else:
+            raise TypeError(
+                f"cannot encode {type(tag).__name__}.{name}: "
+                f"{type(value).__name__} is not a string or a sequence of strings",
+            )
+
+
+def _decode_tag(cls: type[Tag], data: bytes, offset: int) -> tuple[Any, int]:
+    names = _init_fields(cls)
+    if names is None:
+        raise TypeError(cls)
+    values: list[str | tuple[str, ...]] = []
+    for _ in names:
+        kind = data[offset]
+        offset += 1
+        if kind == _STR:
+            value, offset = _read_str(data, offset)
+            values.append(value)
+        elif kind == _SEQUENCE:
+            count, offset = _read_varint(data, offset)
+            items = []
+            for _ in range(count):
+                item, offset = _read_str(data, offset)
+                items.append(item)
+            values.append(tuple(items))
+        else:
+            raise TypeError(kind)
+    return cls(*values), offset
+
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class TextTag(Tag):
     """A simple tag holding text only."""
 
+    schema = TagSchema({}, default=AppendField("text"), joined=("text",))
+
     text: str
     """The tag's text."""
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> TextTag:
-        return cls(text="\n".join(line.value for line in lines))
-
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class ValueDescTag(Tag):
     """A tag holding a value and a description."""
 
@@ -70,58 +474,72 @@ class ValueDescTag(Tag):
     description_field_name: ClassVar[str] = "description"
     """The name of the field containing the description."""
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> Self:
-        value, description = "", []
-        for line in lines:
-            if line.tag == cls.tag:
-                split = line.value.split(" ", 1)
-                if len(split) > 1:
-                    value = split[0]
-                    description.append(split[1])
-                else:
-                    value = split[0]
-            else:
-                description.append(line.value)
-        return cls(**{cls.value_field_name: value, cls.description_field_name: "\n".join(description)})
-
-
-@dataclass
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        # Build the schema of each subclass from its tag and field names.
+        if getattr(cls, "tag", None) and "schema" not in cls.__dict__:
+            cls.schema = TagSchema(
+                {
+                    cls.tag: ParseField(
+                        _split_value,
+                        fields=(cls.value_field_name, cls.description_field_name),
+                    ),
+                },
+                default=AppendField(cls.description_field_name),
+                joined=(cls.description_field_name,),
+            )
+        # Slotted dataclasses are recreated, so the class cell used by `super()` would point to the former class.
+        super(ValueDescTag, cls).__init_subclass__(**kwargs)  # noqa: UP008
+
+
+def _split_value(value: str) -> list[str]:
+    return value.split(" ", 1)
+
+
+# Text tags adding no fields are not decorated: they inherit the methods generated for `TextTag`,
+# and declare empty slots. Generating them again for each subclass made imports twice as slow.
 class AuthorTag(TextTag):
     """A tag representing an author."""
 
+    __slots__ = ()
+
 
-@dataclass
 class BugTag(TextTag):
     """A tag representing a bug note."""
 
+    __slots__ = ()
+
 
-@dataclass
 class BriefTag(TextTag):
     """A tag representing a summary."""
 
+    __slots__ = ()
+
 
-@dataclass
 class CaveatTag(TextTag):
     """A tag representing caveats."""
 
+    __slots__ = ()
+
 
-@dataclass
 class CopyrightTag(TextTag):
     """A tag representing copyright information."""
 
+    __slots__ = ()
+
 
-@dataclass
 class DateTag(TextTag):
     """A tag representing a date."""
 
+    __slots__ = ()
+
 
-@dataclass
 class DescTag(TextTag):
     """A tag representing a description."""
 
+    __slots__ = ()
+
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class EnvTag(ValueDescTag):
     """A tag representing an environment variable used by the script."""
 
@@ -133,12 +551,13 @@ class EnvTag(ValueDescTag):
     """The environment variable description."""
 
 
-@dataclass
 class ErrorTag(TextTag):
     """A tag representing a known error."""
 
+    __slots__ = ()
+
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class ExampleTag(Tag):
     """A tag representing a code/shell example."""
 
@@ -151,40 +570,17 @@ class ExampleTag(Tag):
     description: str
     """The example's description."""
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> ExampleTag:
-        brief, code, description = [], [], []
-        code_lang = ""
-        current = None
-        for line in lines:
-            if line.tag == "example":
-                if line.value:
-                    brief.append(line.value)
-                current = "brief"
-            elif line.tag == "example-code":
-                if line.value:
-                    code_lang = line.value
-                current = "code"
-            elif line.tag == "example-description":
-                if line.value:
-                    description.append(line.value)
-                current = "description"
-            elif current == "brief":
-                brief.append(line.value)
-            elif current == "code":
-                code.append(line.value)
-            elif current == "description":
-                description.append(line.value)
-
-        return ExampleTag(
-            brief="\n".join(brief),
-            code="\n".join(code),
-            code_lang=code_lang,
-            description="\n".join(description),
-        )
-
-
-@dataclass
+    schema = TagSchema(
+        {
+            "example": AppendField("brief", continues="brief", skip_empty=True),
+            "example-code": SetField("code_lang", continues="code", skip_empty=True),
+            "example-description": AppendField("description", continues="description", skip_empty=True),
+        },
+        joined=("brief", "code", "description"),
+    )
+
+
+@dataclass(frozen=True, **_slots)
 class ExitTag(ValueDescTag):
     """A tag representing an exit code."""
 
@@ -197,7 +593,7 @@ class ExitTag(ValueDescTag):
     """The exit code description."""
 
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class FileTag(ValueDescTag):
     """A tag representing a file used by a script."""
 
@@ -209,7 +605,7 @@ class FileTag(ValueDescTag):
     """The file description."""
 
 
-@dataclass
+@dataclass(frozen=True, **_slots)
 class FunctionTag(Tag):
     """A tag representing a shell function."""
 
@@ -234,72 +630,53 @@ class FunctionTag(Tag):
     stdout: Sequence[str]
     """The function's standard output."""
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> FunctionTag:
-        brief = ""
-        prototype = ""
-        description = []
-        arguments = []
-        return_codes = []
-        preconditions = []
-        seealso = []
-        stderr = []
-        stdin = []
-        stdout = []
-        for line in lines:
-            if line.tag == "function":
-                prototype = line.value
-            elif line.tag == "function-brief":
-                brief = line.value
-            elif line.tag == "function-description":
-                description.append(line.value)
-            elif line.tag == "function-argument":
-                arguments.append(line.value)
-            elif line.tag == "function-precondition":
-                preconditions.append(line.value)
-            elif line.tag == "function-return":
-                return_codes.append(line.value)
-            elif line.tag == "function-seealso":
-                seealso.append(line.value)
-            elif line.tag == "function-stderr":
-                stderr.append(line.value)
-            elif line.tag == "function-stdin":
-                stdin.append(line.value)
-            elif line.tag == "function-stdout":
-                stdout.append(line.value)
-            else:
-                description.append(line.value)
-
-        return FunctionTag(
-            prototype=prototype,
-            brief=brief,
-            description="\n".join(description),
-            arguments=arguments,
-            preconditions=preconditions,
-            return_codes=return_codes,
-            seealso=seealso,
-            stderr=stderr,
-            stdin=stdin,
-            stdout=stdout,
-        )
-
-
-@dataclass
+    schema = TagSchema(
+        {
+            "function": SetField("prototype"),
+            "function-brief": SetField("brief"),
+            "function-description": AppendField("description"),
+            "function-argument": AppendField("arguments"),
+            "function-precondition": AppendField("preconditions"),
+            "function-return": AppendField("return_codes"),
+            "function-seealso": AppendField("seealso"),
+            "function-stderr": AppendField("stderr"),
+            "function-stdin": AppendField("stdin"),
+            "function-stdout": AppendField("stdout"),
+        },
+        default=AppendField("description"),
+        joined=("description",),
+    )
+
+
 class HistoryTag(TextTag):
     """A tag representing a script's history."""
 
+    __slots__ = ()
+
 
-@dataclass
 class LicenseTag(TextTag):
     """A tag representing a license."""
 
+    __slots__ = ()
+
 
-@dataclass
 class NoteTag(TextTag):
     """A tag representing a note."""
 
+    __slots__ = ()
+
 
-@dataclass
+_option_regex = re.compile(r"^(?P<short>-\w)?(?:, )?(?P<long>--[\w-]+)? ?(?P<positional>.+)?")
+
+
+def _parse_option(value: str) -> tuple[str, ...]:
+    match = _option_regex.search(value)
+    if match:
+        return match.groups(default="")
+    return ("", "", value)
+
+
+@dataclass(frozen=True, **_slots)
 class OptionTag(Tag):
     """A tag representing a command-line option."""
 
@@ -315,10 +692,13 @@ class OptionTag(Tag):
     """The option group."""
     description: str
     """The option description."""
+    signature: str = field(init=False, repr=False, compare=False)
+    """The signature of the option."""
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "signature", self._signature())
 
-    @cached_property
-    def signature(self) -> str:
-        """The signature of the option."""
+    def _signature(self) -> str:
         sign = ""
         if self.short:
             sign = self.short
@@ -334,57 +714,47 @@ class OptionTag(Tag):
             sign += self.positional
         return sign
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> OptionTag:
-        short, long, positional, default, group = "", "", "", "", ""
-        description = []
-        for line in lines:
-            if line.tag == "option":
-                search = re.search(
-                    r"^(?P<short>-\w)?(?:, )?(?P<long>--[\w-]+)? ?(?P<positional>.+)?",
-                    line.value,
-                )
-                if search:
-                    short, long, positional = search.groups(default="")
-                else:
-                    positional = line.value
-            elif line.tag == "option-default":
-                default = line.value
-            elif line.tag == "option-group":
-                group = line.value
-            else:
-                description.append(line.value)
-        return OptionTag(
-            short=short,
-            long=long,
-            positional=positional,
-            default=default,
-            group=group,
-            description="\n".join(description),
-        )
-
-
-@dataclass
+    schema = TagSchema(
+        {
+            "option": ParseField(_parse_option, fields=("short", "long", "positional")),
+            "option-default": SetField("default"),
+            "option-group": SetField("group"),
+        },
+        default=AppendField("description"),
+        joined=("description",),
+    )
+
+
 class SeealsoTag(TextTag):
     """A tag representing "See Also" information."""
 
+    __slots__ = ()
+
 
-@dataclass
 class StderrTag(TextTag):
     """A tag representing the standard error of a script/function."""
 
+    __slots__ = ()
+
 
-@dataclass
 class StdinTag(TextTag):
     """A tag representing the standard input of a script/function."""
 
+    __slots__ = ()
+
 
-@dataclass
 class StdoutTag(TextTag):
     """A tag representing the standard output of a script/function."""
 
+    __slots__ = ()
+
 
-@dataclass
+def _split_usage(value: str) -> tuple[str, str]:
+    program, _, command = value.partition(" ")
+    return program, command
+
+
+@dataclass(frozen=True, **_slots)
 class UsageTag(Tag):
     """A tag representing the command-line usage of a script."""
 
@@ -393,23 +763,18 @@ class UsageTag(Tag):
     command: str
     """The command-line usage."""
 
-    @classmethod
-    def from_lines(cls, lines: Sequence[DocLine]) -> UsageTag:
-        program, command = "", ""
-        split = lines[0].value.split(" ", 1)
-        if len(split) > 1:
-            program, command = split
-        else:
-            program = split[0]
-        if len(lines) > 1:
-            command = command + "\n" + "\n".join(line.value for line in lines[1:])
-        return UsageTag(program=program, command=command)
+    schema = TagSchema(
+        {"usage": ParseField(_split_usage, fields=("program", "command"))},
+        default=AppendField("command"),
+        joined=("command",),
+    )
 
 
-@dataclass
 class VersionTag(TextTag):
     """A tag representing a version."""
 
+    __slots__ = ()
+
 
 TAGS: dict[str | None, type[Tag]] = {
     None: TextTag,
@@ -438,3 +803,49 @@ TAGS: dict[str | None, type[Tag]] = {
     "version": VersionTag,
 }
 """A dictionary of tag names and their corresponding tag classes."""
+
+
+def _encode_sections(sections: Mapping[str, list[Tag]]) -> bytes:
+    # Sections are encoded as a marker byte and their name (no name for untagged blocks),
+    # their number of tags, and the tags. Tags are decoded with the class registered for their section:
+    # tags of other classes cannot be encoded.
+    out = bytearray()
+    _write_varint(out, len(sections))
+    for name, tags in sections.items():
+        if name is None:
+            out.append(0)
+        else:
+            out.append(1)
+            _write_str(out, name)
+        _write_varint(out, len(tags))
+        tag_class = TAGS.get(name, TAGS[None])
+        for tag in tags:
+            if type(tag) is not tag_class:
+                raise TypeError(
+                    f"cannot encode {type(tag).__name__} in section {name!r}: expected {tag_class.__name__}",
+                )
+            _encode_tag(tag, out)
+    return bytes(out)
+
+
+def _decode_sections(data: bytes) -> dict[str, list[Tag]]:
+    sections: dict[str, list[Tag]] = {}
+    try:
+        count, offset = _read_varint(data, 0)
+        for _ in range(count):
+            name: str | None = None
+            offset += 1
+            if data[offset - 1]:
+                name, offset = _read_str(data, offset)
+            tag_class = TAGS.get(name, TAGS[None])
+            size, offset = _read_varint(data, offset)
+            tags = []
+            for _ in range(size):
+                tag, offset = _decode_tag(tag_class, data, offset)
+                tags.append(tag)
+            sections[name] = tags  # type: ignore[index]
+    except (IndexError, UnicodeDecodeError, TypeError) as error:
+        raise ValueError("invalid sections encoding") from error
+    if offset != len(data):
+        raise ValueError("invalid sections encoding: trailing data")
+    return sections
@@ -2,41 +2,259 @@
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import json
 import os
+import pickle
 import sys
-from copy import deepcopy
+from collections.abc import Collection, MutableMapping
+from functools import cache
 from importlib.metadata import entry_points
-from typing import Any
+from itertools import islice
+from typing import TYPE_CHECKING, Any
 
-from jinja2 import Environment, FileSystemLoader
+import jinja2
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
 from jinja2.exceptions import TemplateNotFound
 
+from shellman._internal.context import _layered_context
 from shellman._internal.templates.filters import FILTERS
+from shellman._internal.templates.precompile import _ENV_OPTIONS, _precompiled_loader, _PrecompiledLoader
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from jinja2.bccache import Bucket
+    from jinja2.runtime import Context
 
 if sys.version_info < (3, 10):
-    from importlib_metadata import entry_points  # type: ignore[assignment]
+    from importlib_metadata import EntryPoint, entry_points  # type: ignore[assignment]
 else:
-    from importlib.metadata import entry_points
+    from importlib.metadata import EntryPoint, entry_points
 
 
 def _get_builtin_path() -> str:
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 
 
-def _get_env(path: str) -> Environment:
+def _get_compiled_path() -> str:
+    # Built-in templates are compiled to Python modules in this directory when building wheels.
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "compiled")
+
+
+TEMPLATE_CACHE_ENV_VAR = "SHELLMAN_TEMPLATE_CACHE"
+"""The environment variable to set the directory of the template bytecode cache and plugin index.
+
+Set it empty to disable the cache.
+"""
+
+
+def _user_cache_dir() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "shellman", "templates")
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    # Jinja invalidates entries when the template source changes (checksum), or when its bytecode format
+    # or the Python version changes (magic header). Entries are also separated by Jinja version,
+    # since compiled templates call into Jinja's runtime.
+    # Async environments compile templates to different code, so their entries are kept apart.
+    # The cache is an optimization only: failing to read or write entries is not an error.
+    # Without a directory, the directory is read from the environment each time the cache is used,
+    # because the built-in environment is created at import time, before the process environment is final.
+
+    def __init__(self, directory: str | None = None, *, enable_async: bool = False) -> None:
+        pattern = "%s.async.cache" if enable_async else "%s.cache"
+        self._base = directory
+        super().__init__(self._resolve() or os.curdir, pattern)
+
+    def _resolve(self) -> str | None:
+        base = self._base if self._base is not None else _get_cache_dir()
+        return os.path.join(base, f"jinja2-{jinja2.__version__}") if base else None
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        directory = self._resolve()
+        if directory is None:
+            return
+        self.directory = directory
+        try:
+            super().load_bytecode(bucket)
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            bucket.reset()
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        directory = self._resolve()
+        if directory is None:
+            return
+        self.directory = directory
+        with contextlib.suppress(OSError):
+            os.makedirs(directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+
+
+def _get_cache_dir() -> str | None:
+    directory = os.environ.get(TEMPLATE_CACHE_ENV_VAR)
+    if directory is None:
+        directory = _user_cache_dir()
+    return directory or None
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Write a cache file atomically, so that concurrent runs never read partial files.
+    # Caches are an optimization only: failing to write them is not an error.
+    with contextlib.suppress(OSError):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+
+
+def _get_bytecode_cache(*, enable_async: bool = False) -> _BytecodeCache | None:
+    directory = _get_cache_dir()
+    return _BytecodeCache(directory, enable_async=enable_async) if directory else None
+
+
+def _get_env(path: str, *, enable_async: bool = False) -> Environment:
     return Environment(  # noqa: S701
         loader=FileSystemLoader(path),
-        trim_blocks=True,
-        lstrip_blocks=True,
-        keep_trailing_newline=True,
-        auto_reload=False,
+        bytecode_cache=_get_bytecode_cache(enable_async=enable_async),
+        enable_async=enable_async,
+        **_ENV_OPTIONS,
     )
 
 
-builtin_env = _get_env(_get_builtin_path())
+def _get_async_env(env: Environment) -> Environment:
+    # The async variant of an environment, sharing its loader, filters and globals.
+    # Async environments compile templates to different code: templates are compiled from their sources
+    # instead of being loaded from precompiled modules, and cached apart from their sync variants.
+    if env.is_async:
+        return env
+    loader = env.loader
+    bytecode_cache = None
+    if isinstance(loader, _PrecompiledLoader):
+        loader = loader.sources
+        bytecode_cache = _BytecodeCache(enable_async=True)
+    elif isinstance(env.bytecode_cache, _BytecodeCache):
+        bytecode_cache = _BytecodeCache(env.bytecode_cache._base, enable_async=True)
+    return env.overlay(enable_async=True, loader=loader, bytecode_cache=bytecode_cache)
+
+
+def _get_builtin_env() -> Environment:
+    # Compiled templates skip lexing and parsing entirely. When they are missing (source checkouts,
+    # editable installs) or stale, templates are compiled from their sources, with the bytecode cache.
+    path = _get_builtin_path()
+    loader = _precompiled_loader(path, _get_compiled_path())
+    if loader is None:
+        return Environment(loader=FileSystemLoader(path), bytecode_cache=_BytecodeCache(), **_ENV_OPTIONS)  # noqa: S701
+    return Environment(loader=loader, **_ENV_OPTIONS)  # noqa: S701
+
+
+builtin_env = _get_builtin_env()
 """The built-in Jinja environment."""
 
 
+class _DynamicAccess(Exception):  # noqa: N818
+    # Raised when a template accesses documentation sections in a way that cannot be known statically.
+    pass
+
+
+def _walk(
+    node: nodes.Node,
+    parents: tuple[nodes.Node, ...] = (),
+) -> Iterator[tuple[nodes.Node, tuple[nodes.Node, ...]]]:
+    yield node, parents
+    for child in node.iter_child_nodes():
+        yield from _walk(child, (*parents, node))
+
+
+def _constant_key(node: nodes.Node, child: nodes.Node) -> str | None:
+    # The attribute or constant item accessed on `child` by `node`, if any.
+    if isinstance(node, nodes.Getattr) and node.node is child:
+        return node.attr
+    if isinstance(node, nodes.Getitem) and node.node is child and isinstance(node.arg, nodes.Const):
+        return node.arg.value if isinstance(node.arg.value, str) else None
+    return None
+
+
+def _doc_sections(env: Environment, name: str, seen: set[str] | None = None) -> set[str]:
+    # Find the sections read as `shellman.doc.<section>` or `shellman.doc["<section>"]` in a template
+    # and in the templates it includes, imports or extends. Any other use of `shellman.doc`
+    # (iterating on it, passing it to a filter or macro, assigning it, etc.) is dynamic access.
+    seen = set() if seen is None else seen
+    if name in seen:
+        return set()
+    seen.add(name)
+    if env.loader is None:
+        raise _DynamicAccess(name)
+    source, filename, _ = env.loader.get_source(env, name)
+    ast = env.parse(source, name, filename)
+    sections = set()
+    for node, parents in _walk(ast):
+        if isinstance(node, (nodes.Include, nodes.Extends, nodes.Import, nodes.FromImport)):
+            if not isinstance(node.template, nodes.Const) or not isinstance(node.template.value, str):
+                raise _DynamicAccess(name)
+            sections |= _doc_sections(env, node.template.value, seen)
+        elif isinstance(node, nodes.Name) and node.name == "shellman":
+            if node.ctx != "load" or not parents:
+                raise _DynamicAccess(name)
+            key = _constant_key(parents[-1], node)
+            if key is None:
+                raise _DynamicAccess(name)
+            if key != "doc":
+                continue
+            section = _constant_key(parents[-2], parents[-1]) if len(parents) > 1 else None
+            # Jinja gets attributes before items: `shellman.doc.items` is the mapping's method.
+            if section is None or hasattr(MutableMapping, section) or hasattr(dict, section):
+                raise _DynamicAccess(name)
+            sections.add(section)
+    return sections
+
+
+_SECTIONS_FORMAT = "1"
+
+
+def _source_digest(env: Environment, name: str) -> str:
+    source, _, _ = env.loader.get_source(env, name)  # type: ignore[union-attr]
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _analyze_doc_sections(env: Environment, name: str) -> tuple[frozenset[str] | None, set[str]]:
+    # The sections read by a template, and the names of the templates analyzed to find them.
+    seen: set[str] = set()
+    try:
+        return frozenset(_doc_sections(env, name, seen)), seen
+    except _DynamicAccess:
+        return None, seen
+
+
+def _cached_doc_sections(env: Environment, name: str) -> frozenset[str] | None:
+    # Parsing templates to analyze them costs much more than loading them compiled: store the result
+    # in the cache directory, keyed by the template source, and valid as long as the sources
+    # of the templates it includes, imports or extends are unchanged.
+    directory = _get_cache_dir()
+    if directory is None or env.loader is None:
+        return _analyze_doc_sections(env, name)[0]
+    syntax = (env.block_start_string, env.variable_start_string, env.comment_start_string, env.line_statement_prefix)
+    key = json.dumps([_SECTIONS_FORMAT, jinja2.__version__, syntax, name, _source_digest(env, name)])
+    path = os.path.join(directory, "sections", f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+    with contextlib.suppress(OSError, ValueError, KeyError, TypeError, TemplateNotFound):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if all(_source_digest(env, template) == digest for template, digest in data["templates"].items()):
+            return None if data["sections"] is None else frozenset(data["sections"])
+    sections, seen = _analyze_doc_sections(env, name)
+    digests = {template: _source_digest(env, template) for template in seen}
+    _write_json(path, {"sections": None if sections is None else sorted(sections), "templates": digests})
+    return sections
+
+
 class Template:
     """Shellman templates."""
 
@@ -75,15 +293,50 @@ class Template:
         """The base template file."""
         self.context = context or {}
         """The base context."""
-        self.__template: Template = None  # type: ignore[assignment]
+        self.__template: jinja2.Template = None  # type: ignore[assignment]
+        self.__async_template: jinja2.Template | None = None
+        self.__doc_sections: frozenset[str] | None = None
+        self.__doc_sections_analyzed = False
 
     @property
-    def template(self) -> Template:
+    def template(self) -> jinja2.Template:
         """The corresponding Jinja template."""
         if self.__template is None:
             self.__template = self.env.get_template(self.base_template)
         return self.__template
 
+    @property
+    def doc_sections(self) -> frozenset[str] | None:
+        """The documentation sections read by the template, or `None` when it accesses them dynamically.
+
+        Sections are found by static analysis of the template and of the templates it includes,
+        imports or extends: only sections accessed with constant names, like `shellman.doc.usage`,
+        can be found. Any other use of `shellman.doc`, or any failure to analyze the templates
+        (for example with loaders that cannot give their sources), makes the analysis fall back to `None`.
+        """
+        if not self.__doc_sections_analyzed:
+            try:
+                self.__doc_sections = _cached_doc_sections(self.env, self.base_template)
+            except Exception:  # noqa: BLE001
+                # The analysis only prunes sections: when it fails, every section is parsed,
+                # and rendering reports the actual errors, if any.
+                self.__doc_sections = None
+            self.__doc_sections_analyzed = True
+        return self.__doc_sections
+
+    def _get_async_template(self) -> jinja2.Template:
+        # The template loaded from the async variant of our environment, used by `render_async`.
+        if self.__async_template is None:
+            self.__async_template = _get_async_env(self.env).get_template(self.base_template)
+        return self.__async_template
+
+    def _new_context(self, template: jinja2.Template, variables: dict[str, Any]) -> Context:
+        # Instead of deep-copying the base context on each render, layer the variables over it:
+        # its mutable values are only copied when the template reads them. Jinja would flatten a mapping
+        # passed to `render`, so we create a context sharing our layers, like `render` does for includes.
+        layers = _layered_context(variables, self.context, template.globals)
+        return template.new_context(layers, shared=True)  # type: ignore[arg-type]
+
     def render(self, **kwargs: Any) -> str:
         """Render the template.
 
@@ -94,9 +347,84 @@ class Template:
         Returns:
             The rendered text.
         """
-        context = deepcopy(self.context)
-        context.update(kwargs)
-        return self.template.render(**context).rstrip("\n")
+        if self.env.is_async:
+            import asyncio  # noqa: PLC0415
+
+            return asyncio.run(self.render_async(**kwargs))
+        context = self._new_context(self.template, kwargs)
+        try:
+            return self.env.concat(self.template.root_render_func(context)).rstrip("\n")
+        except Exception:  # noqa: BLE001
+            self.env.handle_exception()
+
+    async def render_async(self, **kwargs: Any) -> str:
+        """Render the template asynchronously.
+
+        The template is compiled for an async variant of the environment, sharing its loader and filters,
+        so that async filters and functions can be awaited without blocking the event loop.
+
+        Parameters:
+            **kwargs: Keyword arguments passed to Jinja's render method.
+
+        Returns:
+            The rendered text.
+        """
+        import asyncio  # noqa: PLC0415
+
+        template = self._get_async_template()
+        env = template.environment
+        context = self._new_context(template, kwargs)
+        chunks = []
+        try:
+            async for chunk in template.root_render_func(context):  # type: ignore[attr-defined]
+                chunks.append(chunk)
+                if not len(chunks) % _GENERATE_BATCH_SIZE:
+                    # Rendering only suspends when awaiting async values: let other tasks run regularly.
+                    await asyncio.sleep(0)
+        except Exception:  # noqa: BLE001
+            return env.handle_exception()
+        return env.concat(chunks).rstrip("\n")
+
+    def generate(self, **kwargs: Any) -> Iterator[str]:
+        """Render the template chunk by chunk.
+
+        The chunks joined together are the same as the text returned by [`render`][shellman.Template.render],
+        without ever building the whole text: trailing newlines are held back until more text follows.
+
+        Parameters:
+            **kwargs: Keyword arguments passed to Jinja's generate method.
+
+        Yields:
+            The rendered chunks.
+        """
+        if self.env.is_async:
+            yield self.render(**kwargs)
+            return
+        context = self._new_context(self.template, kwargs)
+        try:
+            yield from _rstrip_newlines(self.template.root_render_func(context))
+        except Exception:  # noqa: BLE001
+            self.env.handle_exception()
+
+
+_GENERATE_BATCH_SIZE = 1024
+
+
+def _rstrip_newlines(chunks: Iterable[str], batch_size: int = _GENERATE_BATCH_SIZE) -> Iterator[str]:
+    # Same text as `"".join(chunks).rstrip("\n")`, without joining all chunks. Templates yield many small chunks,
+    # so they are joined in batches, and trailing newlines are held back until more text follows.
+    iterator = iter(chunks)
+    pending = ""
+    while batch := list(islice(iterator, batch_size)):
+        chunk = "".join(batch)
+        text = chunk.rstrip("\n")
+        if text:
+            if pending:
+                yield pending
+            yield text
+            pending = chunk[len(text) :]
+        else:
+            pending += chunk
 
 
 def _get_custom_template(base_template_path: str) -> Template:
@@ -107,27 +435,118 @@ def _get_custom_template(base_template_path: str) -> Template:
         raise FileNotFoundError(base_template_path) from error
 
 
-def _load_plugin_templates() -> None:
+_PLUGIN_INDEX = "plugins.json"
+_PLUGIN_INDEX_FORMAT = "2"
+_SITE_DIRECTORIES = frozenset(("site-packages", "dist-packages"))
+_loaded_plugins: set[tuple[str, str]] = set()
+
+
+def _site_state() -> str:
+    # Installing, upgrading or removing distributions adds or removes metadata directories
+    # in site directories, changing their modification time. Other entries of `sys.path`,
+    # like the current directory, change often without changing installed plugins: they are ignored.
+    state: list[Any] = [_PLUGIN_INDEX_FORMAT, sys.version]
+    for path in sys.path:
+        if os.path.basename(path) not in _SITE_DIRECTORIES:
+            continue
+        try:
+            state.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            state.append((path, None))
+    return hashlib.sha256(json.dumps(state).encode()).hexdigest()
+
+
+def _load_plugin(entry_point: EntryPoint) -> list[str]:
+    # Register the templates of a plugin, and return their names.
+    obj = entry_point.load()
+    plugin_templates = {}
+    if isinstance(obj, Template):
+        plugin_templates[entry_point.name] = obj
+    elif isinstance(obj, dict):
+        plugin_templates = {name: template for name, template in obj.items() if isinstance(template, Template)}
+    templates.update(plugin_templates)
+    _loaded_plugins.add((entry_point.name, entry_point.value))
+    return list(plugin_templates)
+
+
+def _scan_plugins() -> dict[str, tuple[str, str]]:
+    index = {}
     for entry_point in entry_points(group="shellman"):  # type: ignore[call-arg]
-        obj = entry_point.load()  # type: ignore[attr-defined]
-        if isinstance(obj, Template):
-            templates[entry_point.name] = obj  # type: ignore[attr-defined]
-        elif isinstance(obj, dict):
-            for name, template in obj.items():
-                if isinstance(template, Template):
-                    templates[name] = template
+        for name in _load_plugin(entry_point):  # type: ignore[arg-type]
+            index[name] = (entry_point.name, entry_point.value)  # type: ignore[attr-defined]
+    return index
+
+
+@cache
+def _plugin_index() -> dict[str, tuple[str, str]]:
+    # The names of the templates provided by plugins, with the entry points providing them.
+    # Plugins must be imported to know the names of their templates, so the index is cached on disk,
+    # and only built again when site directories change.
+    directory = _get_cache_dir()
+    if directory is None:
+        return _scan_plugins()
+    path = os.path.join(directory, _PLUGIN_INDEX)
+    state = _site_state()
+    with contextlib.suppress(OSError, ValueError, KeyError, TypeError), open(path, encoding="utf-8") as file:
+        data = json.load(file)
+        if data["state"] == state:
+            return {name: (entry_name, value) for name, (entry_name, value) in data["templates"].items()}
+    index = _scan_plugins()
+    _write_json(path, {"state": state, "templates": index})
+    return index
+
+
+@cache
+def _rescan_plugin_index() -> dict[str, tuple[str, str]]:
+    # Scan plugins again, updating the index in place and on disk.
+    index = _plugin_index()
+    index.clear()
+    index.update(_scan_plugins())
+    directory = _get_cache_dir()
+    if directory is not None:
+        _write_json(os.path.join(directory, _PLUGIN_INDEX), {"state": _site_state(), "templates": index})
+    return index
+
+
+def _plugin_entry(name: str) -> tuple[str, str] | None:
+    # The entry point providing a template, if any. Plugins installed without changing site directories
+    # (editable installs, `.pth` files, other `sys.path` entries) are missing from an index read from disk:
+    # unknown names scan plugins again, once per process. Only invalid names pay for this scan.
+    index = _plugin_index()
+    if name not in index and name not in templates:
+        index = _rescan_plugin_index()
+    return index.get(name)
+
+
+def _get_template(name: str) -> Template:
+    # Plugins are only imported when one of their templates is requested. They can override built-in templates.
+    entry = _plugin_entry(name)
+    if entry is not None and entry not in _loaded_plugins:
+        _load_plugin(EntryPoint(name=entry[0], value=entry[1], group="shellman"))
+    return templates[name]
 
 
 def _names() -> list[str]:
-    return sorted(templates.keys())
+    return sorted({*templates, *_plugin_index()})
+
+
+class _TemplateChoices(Collection):
+    # The template names accepted on the command line, only listed when needed (help, invalid choices).
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, str):
+            return False
+        return item.startswith("path:") or item in templates or _plugin_entry(item) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_names())
 
+    def __len__(self) -> int:
+        return len(_names())
 
-def _parser_choices() -> tuple[str]:
-    class TemplateChoice(tuple):
-        def __contains__(self, item: str) -> bool:  # type: ignore[override]
-            return super().__contains__(item) or item.startswith("path:")
 
-    return TemplateChoice(_names())  # type: ignore[return-value]
+def _parser_choices() -> Collection[str]:
+    return _TemplateChoices()
 
 
 helptext = Template(
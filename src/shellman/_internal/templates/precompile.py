@@ -0,0 +1,85 @@
+# Ahead-of-time compilation of the built-in templates.
+#
+# This module is also loaded by the build hook (`pdm_build.py`) to compile
+# templates into the wheel: it must only import the standard library and Jinja.
+# The filters module is loaded the same way, since Jinja compiles calls to filters
+# depending on how they are decorated (`pass_environment`, etc.).
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any
+
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+
+_ENV_OPTIONS: dict[str, Any] = {
+    "trim_blocks": True,
+    "lstrip_blocks": True,
+    "keep_trailing_newline": True,
+    "auto_reload": False,
+}
+_MANIFEST = "manifest.json"
+
+
+def _source_digests(source_dir: str) -> dict[str, str]:
+    loader = FileSystemLoader(source_dir)
+    digests = {}
+    for name in loader.list_templates():
+        with open(os.path.join(source_dir, *name.split("/")), "rb") as file:
+            digests[name] = hashlib.sha256(file.read()).hexdigest()
+    return digests
+
+
+def _manifest(source_dir: str) -> dict[str, Any]:
+    # Compiled templates depend on their sources, on the environment options and filters,
+    # and on Jinja's code generator.
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "filters.py"), "rb") as file:
+        filters = hashlib.sha256(file.read()).hexdigest()
+    return {
+        "jinja2": jinja2.__version__,
+        "options": _ENV_OPTIONS,
+        "filters": filters,
+        "templates": _source_digests(source_dir),
+    }
+
+
+def _compile(source_dir: str, target_dir: str, filters: dict[str, Any]) -> list[str]:
+    # Compile templates to Python modules, and write the manifest used to detect stale modules.
+    env = Environment(loader=FileSystemLoader(source_dir), **_ENV_OPTIONS)  # noqa: S701
+    env.filters.update(filters)
+    os.makedirs(target_dir, exist_ok=True)
+    env.compile_templates(target_dir, zip=None, ignore_errors=False)
+    with open(os.path.join(target_dir, _MANIFEST), "w", encoding="utf-8") as file:
+        json.dump(_manifest(source_dir), file, indent=2, sort_keys=True)
+    return sorted(os.listdir(target_dir))
+
+
+class _PrecompiledLoader(ModuleLoader):
+    # Load compiled templates, but read their sources from the templates directory, for static analysis.
+
+    has_source_access = True
+
+    def __init__(self, compiled_dir: str, source_dir: str) -> None:
+        super().__init__(compiled_dir)
+        self.sources = FileSystemLoader(source_dir)
+
+    def get_source(self, environment: Environment, template: str) -> tuple[str, str | None, Any]:
+        return self.sources.get_source(environment, template)
+
+    def list_templates(self) -> list[str]:
+        return self.sources.list_templates()
+
+
+def _precompiled_loader(source_dir: str, compiled_dir: str) -> _PrecompiledLoader | None:
+    # Use compiled templates only when they were compiled from the current sources, with the current Jinja version.
+    try:
+        with open(os.path.join(compiled_dir, _MANIFEST), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if manifest != _manifest(source_dir):
+        return None
+    return _PrecompiledLoader(compiled_dir, source_dir)
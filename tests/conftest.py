@@ -1,6 +1,22 @@
 """Configuration for the pytest test suite."""
 
+from __future__ import annotations
+
 import os
+from typing import TYPE_CHECKING
+from unittest import mock
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_template_cache() -> Iterator[None]:
+    # Do not write compiled templates in the user's cache directory.
+    with mock.patch.dict(os.environ, {"SHELLMAN_TEMPLATE_CACHE": ""}):
+        yield
 
 
 def get_fake_script(name: str) -> str:
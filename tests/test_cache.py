@@ -0,0 +1,187 @@
+"""Tests for the `cache` module."""
+
+from __future__ import annotations
+
+import os
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from shellman import main
+from shellman._internal import cache as cache_module
+from shellman._internal.cache import ParseCache
+from shellman._internal.reader import DocFile
+from shellman._internal.tags import BriefTag, Tag
+from tests.conftest import get_fake_script
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    import pytest
+
+    from shellman._internal.reader import DocLine
+
+
+def _brief(doc: DocFile) -> str:
+    brief = doc.sections["brief"][0]
+    assert isinstance(brief, BriefTag)
+    return brief.text
+
+
+def test_cache_hits_and_misses(tmp_path: Path) -> None:
+    """Test that unchanged files are read from the cache.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_text("## \\brief Cached.\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    expected = DocFile(str(script)).sections
+    assert DocFile(str(script), cache=cache).sections == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert DocFile(str(script), cache=cache).sections == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Same contents, different modification time: validated with the contents hash.
+    stat = os.stat(script)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert DocFile(str(script), cache=cache).sections == expected
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    script.write_text("## \\brief Changed.\n")
+    assert _brief(DocFile(str(script), cache=cache)) == "Changed."
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_cache_version_invalidation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that entries are invalidated when the tags registry changes.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    script = get_fake_script("simple.sh")
+    directory = str(tmp_path / "cache")
+    DocFile(script, cache=ParseCache(directory))
+    monkeypatch.setitem(cache_module.TAGS, "custom", cache_module.TAGS[None])
+    cache = ParseCache(directory)
+    DocFile(script, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+@dataclass(frozen=True)
+class _CountTag(Tag):
+    count: int
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[DocLine]) -> _CountTag:
+        return cls(len(lines))
+
+
+def test_cache_skips_unencodable_tags(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that sections with tags the compact format cannot encode are parsed, but not cached.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setitem(cache_module.TAGS, "brief", _CountTag)
+    script = tmp_path / "script.sh"
+    script.write_text("## \\brief Not cached.\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    for _ in range(2):
+        assert DocFile(str(script), cache=cache).sections["brief"] == [_CountTag(1)]
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert not list((tmp_path / "cache").glob("*.pickle"))
+
+
+def test_cache_decoding_errors(tmp_path: Path) -> None:
+    """Test that entries are kept per error policy, and restore the lines that could not be decoded.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_bytes(b"## \\brief Caf\xe9.\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert DocFile(str(script), cache=cache, errors="strict").sections == {}
+    replaced = DocFile(str(script), cache=cache, errors="replace")
+    assert _brief(replaced) == "Caf\ufffd."
+    assert (cache.hits, cache.misses) == (0, 2)
+    ignored = DocFile(str(script), cache=cache, errors="ignore")
+    assert _brief(ignored) == "Caf."
+    assert (cache.hits, cache.misses) == (0, 3)
+    cached = DocFile(str(script), cache=cache, errors="replace")
+    assert cached.sections == replaced.sections
+    assert cached.decode_errors == replaced.decode_errors == [1]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_size_of_overwritten_entries(tmp_path: Path) -> None:
+    """Test that overwriting an entry counts the difference of sizes only.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    directory = tmp_path / "cache"
+    script = tmp_path / "script.sh"
+    cache = ParseCache(str(directory))
+    for index in range(5):
+        script.write_text(f"## \\brief Version {index}.\n")
+        DocFile(str(script), cache=cache)
+    assert cache._size == sum(entry.stat().st_size for entry in directory.iterdir())
+
+
+def test_cache_corrupted_entries(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that corrupted entries are removed and counted as misses.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        caplog: Pytest fixture to capture logs.
+    """
+    script = get_fake_script("simple.sh")
+    directory = tmp_path / "cache"
+    expected = DocFile(script).sections
+    cache = ParseCache(str(directory))
+    DocFile(script, cache=cache)
+    (entry,) = directory.iterdir()
+    data = entry.read_bytes()
+    rng = random.Random(5)  # noqa: S311
+    for number in range(1, 301):
+        if number % 2:
+            entry.write_bytes(data[: rng.randrange(len(data))])
+        else:
+            position = rng.randrange(len(data))
+            entry.write_bytes(data[:position] + rng.randbytes(rng.randint(1, 8)) + data[position + 8 :])
+        assert DocFile(script, cache=cache).sections == expected
+        assert cache.hits + cache.misses == number + 1
+    assert cache.misses > 1
+    assert "Cannot decode" not in caplog.text
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    """Test that the cache stays under its maximum size.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    directory = tmp_path / "cache"
+    cache = ParseCache(str(directory), max_size=1024)
+    for index in range(20):
+        script = tmp_path / f"script{index}.sh"
+        script.write_text(f"## \\brief Script {index}.\n## \\desc {'x' * 100}\n")
+        DocFile(str(script), cache=cache)
+    assert sum(entry.stat().st_size for entry in directory.iterdir()) <= 1024
+
+
+def test_cli_cache_dir(tmp_path: Path) -> None:
+    """Test the `--cache-dir` option.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    directory = tmp_path / "cache"
+    assert main(["--cache-dir", str(directory), get_fake_script("simple.sh")]) == 0
+    assert len(list(directory.iterdir())) == 1
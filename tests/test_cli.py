@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import io
+from typing import TYPE_CHECKING
+
 import pytest
 
 from shellman import do_groffautoemphasis, do_groffautostrong, do_smartwrap, main
 from shellman._internal import debug
+from shellman._internal.cli import _RenderSession
+from shellman._internal.reader import DocStream
+from shellman._internal.templates import templates
 from tests.conftest import get_fake_script
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 
 def test_main() -> None:
     """Basic CLI test."""
@@ -100,3 +109,131 @@ def test_show_debug_info(capsys: pytest.CaptureFixture) -> None:
     assert "system" in captured
     assert "environment" in captured
     assert "packages" in captured
+
+
+def test_debug_sections(capsys: pytest.CaptureFixture) -> None:
+    """Print the sections read by the template.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+    """
+    assert main(["--debug-sections", "-t", "usagetext", get_fake_script("simple.sh")]) == 0
+    captured = capsys.readouterr()
+    assert "reads sections: usage\n" in captured.err
+    assert "skipping sections: author, brief," in captured.err
+    assert captured.out.startswith("usage: ")
+
+
+def test_header_only(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Render the documentation at the top of a script only.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        capsys: Pytest fixture to capture output.
+    """
+    script = tmp_path / "script.sh"
+    script.write_text("#!/bin/bash\n## \\usage prog [-h]\nmain() { :; }\n## \\usage prog --version\n")
+    assert main(["-t", "usagetext", "--header-only", str(script)]) == 0
+    assert capsys.readouterr().out == "usage: prog [-h]\n"
+    assert main(["-t", "usagetext", str(script)]) == 0
+    assert "--version" in capsys.readouterr().out
+
+
+def test_jobs_keep_output_order(capsys: pytest.CaptureFixture) -> None:
+    """Parsing with several processes gives the same output as parsing sequentially.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+    """
+    script = get_fake_script("simple.sh")
+    for options in ([], ["--merge"]):
+        main([*options, script, script, script])
+        sequential = capsys.readouterr().out
+        main([*options, "--jobs", "2", script, script, script])
+        assert capsys.readouterr().out == sequential
+
+
+@pytest.mark.parametrize("jobs", ["-3", "two", "1.5"])
+def test_invalid_jobs(jobs: str, capsys: pytest.CaptureFixture) -> None:
+    """Invalid numbers of jobs are rejected before reaching the process pool.
+
+    Parameters:
+        jobs: The value passed to `--jobs`.
+        capsys: Pytest fixture to capture output.
+    """
+    with pytest.raises(SystemExit):
+        main(["--jobs", jobs, get_fake_script("simple.sh")])
+    assert "is not a valid number of jobs" in capsys.readouterr().err
+
+
+def test_auto_jobs(capsys: pytest.CaptureFixture) -> None:
+    """Zero jobs means as many processes as there are CPUs.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+    """
+    script = get_fake_script("simple.sh")
+    main([script, script])
+    sequential = capsys.readouterr().out
+    assert main(["-j", "0", script, script]) == 0
+    assert capsys.readouterr().out == sequential
+
+
+def test_concatenated_outputs(capsys: pytest.CaptureFixture, tmp_path: Path) -> None:
+    """Outputs of several inputs are separated by blank lines, on stdout or in a file.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = get_fake_script("simple.sh")
+    main([script])
+    single = capsys.readouterr().out
+    assert single.endswith("\n")
+    main([script, script])
+    assert capsys.readouterr().out == f"{single[:-1]}\n\n\n{single}"
+    output = tmp_path / "output.txt"
+    main([script, script, "-o", str(output)])
+    assert output.read_text() == f"{single[:-1]}\n\n\n{single}"
+
+
+def test_output_written_on_success_only(tmp_path: Path) -> None:
+    """Render errors leave existing outputs untouched, without temporary files.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    template = tmp_path / "template"
+    template.write_text("{{ shellman.filename }}{% if shellman.filename == 'b.sh' %}{{ fail() }}{% endif %}")
+    for name in ("a.sh", "b.sh"):
+        (tmp_path / name).write_text("## \\brief Script.\n")
+    output = tmp_path / "output.txt"
+    output.write_text("previous")
+    output.chmod(0o640)
+    with pytest.raises(Exception, match="fail"):
+        main(["-t", f"path:{template}", "-o", str(output), str(tmp_path / "a.sh"), str(tmp_path / "b.sh")])
+    assert output.read_text() == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.sh", "b.sh", "output.txt", "template"]
+    assert main(["-t", f"path:{template}", "-o", str(output), str(tmp_path / "a.sh")]) == 0
+    assert output.read_text() == "a.sh\n"
+    assert output.stat().st_mode & 0o777 == 0o640
+
+
+def test_render_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a render session computes run-invariant values once.
+
+    Parameters:
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    calls = []
+
+    def get_version() -> str:
+        calls.append(1)
+        return "1.0"
+
+    monkeypatch.setattr(debug, "_get_version", get_version)
+    session = _RenderSession(templates["usagetext"], {"shellman": {"version": "2.0"}})
+    docs = [DocStream(io.StringIO(f"## \\usage script_{index} FILE\n")) for index in range(3)]
+    assert [session.render(doc) for doc in docs] == [f"usage: script_{index} FILE" for index in range(3)]
+    assert len(calls) == 1
+    assert session.context == {}
@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 from collections import namedtuple
 
-from shellman._internal.context import _get_cli_context, _get_context, _get_env_context, _update
+from shellman._internal.context import _get_cli_context, _get_context, _get_env_context, _layered_context, _update
 
 
 def test_get_cli_context() -> None:
@@ -48,3 +48,20 @@ def test_update() -> None:
     d2 = {"hello": {"universe": "????"}, "byebye": "universe"}
     _update(d1, d2)
     assert d1 == {"hello": {"world": "what's up?", "universe": "????"}, "byebye": "universe"}
+
+
+def test_layered_context() -> None:
+    """Test that layered contexts never mutate their base, and only copy mutable values when read."""
+    point = (1, 2)
+    base = {"items": [1], "nested": {"key": "value"}, "point": point, "name": "base"}
+    context = _layered_context({"name": "override"}, base, {"global": "value"})
+    assert context["name"] == "override"
+    assert context["global"] == "value"
+    assert context["point"] is point
+    context["items"].append(2)
+    context["nested"]["key"] = "changed"
+    context["new"] = True
+    assert context["items"] == [1, 2]
+    assert context["nested"] == {"key": "changed"}
+    assert base == {"items": [1], "nested": {"key": "value"}, "point": point, "name": "base"}
+    assert set(context) == {"items", "nested", "point", "name", "global", "new"}
@@ -0,0 +1,165 @@
+"""Tests for the `discovery` module."""
+
+from __future__ import annotations
+
+import os
+from typing import IO, TYPE_CHECKING
+
+import pytest
+
+from shellman import main
+from shellman._internal import discovery
+from shellman._internal.discovery import DEFAULT_IGNORE, _discover, _read_files_from
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _make_tree(root: Path) -> None:
+    (root / "lib" / "sub").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / "lib" / "a.sh").write_text("## \\brief A.\n")
+    (root / "lib" / "sub" / "b").write_text("#!/usr/bin/env bash\n## \\brief B.\n")
+    (root / "lib" / "c.py").write_text("#!/usr/bin/env python\n## not shell\n")
+    (root / "lib" / "d.sh").write_bytes(b"\x7fELF\0\0## \\brief binary\n")
+    (root / "lib" / "e.tmp.sh").write_text("## \\brief E.\n")
+    (root / ".git" / "hook.sh").write_text("## \\brief Hook.\n")
+
+
+def test_discover_directories(tmp_path: Path) -> None:
+    """Test walking directories, skipping ignored, binary and non-shell files.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    _make_tree(tmp_path)
+    lib = tmp_path / "lib"
+    found = list(_discover([str(tmp_path)]))
+    assert found == [str(lib / "a.sh"), str(lib / "e.tmp.sh"), str(lib / "sub" / "b")]
+    found = list(_discover([str(tmp_path)], ignore=[*DEFAULT_IGNORE, "*.tmp.*", "lib/sub"]))
+    assert found == [str(lib / "a.sh")]
+
+
+def test_discover_globs_and_files(tmp_path: Path) -> None:
+    """Test expanding glob patterns, and keeping explicit files as is.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    _make_tree(tmp_path)
+    lib = tmp_path / "lib"
+    pattern = os.path.join(str(tmp_path), "**", "*.sh")
+    assert list(_discover([pattern])) == [str(lib / "a.sh"), str(lib / "e.tmp.sh")]
+    assert list(_discover([str(lib / "c.py"), "-"])) == [str(lib / "c.py"), "-"]
+    pattern = os.path.join(str(tmp_path), "lib", "**", "*")
+    found = list(_discover([pattern], ignore=[*DEFAULT_IGNORE, "sub", "lib"]))
+    assert found == [str(lib / "a.sh"), str(lib / "e.tmp.sh")]
+    found = list(_discover([pattern], ignore=[*DEFAULT_IGNORE, "*.tmp.*", "sub/b"]))
+    assert found == [str(lib / "a.sh")]
+
+
+def test_discover_skips_other_extensions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that files with a non-shell extension are not opened.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    _make_tree(tmp_path)
+    opened = []
+
+    def spy_open(path: str, mode: str) -> IO[bytes]:
+        opened.append(path)
+        return open(path, mode)
+
+    monkeypatch.setattr(discovery, "open", spy_open, raising=False)
+    list(_discover([str(tmp_path)]))
+    assert str(tmp_path / "lib" / "c.py") not in opened
+    assert str(tmp_path / "lib" / "sub" / "b") in opened
+
+
+def test_read_files_from(tmp_path: Path) -> None:
+    """Test reading NUL-separated paths.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    files_from = tmp_path / "files"
+    files_from.write_bytes(b"a.sh\0dir/with space.sh\0")
+    assert _read_files_from(str(files_from)) == ["a.sh", "dir/with space.sh"]
+
+
+def test_cli_directory_input(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test passing a directory and a list of files to the CLI.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        capsys: Pytest fixture to capture output.
+    """
+    _make_tree(tmp_path)
+    assert main(["-t", "wikipage", "--ignore", "sub", str(tmp_path)]) == 0
+    output = capsys.readouterr().out
+    assert "A." in output
+    assert "E." in output
+    assert "B." not in output
+    files_from = tmp_path / "files"
+    files_from.write_bytes(str(tmp_path / "lib" / "sub" / "b").encode() + b"\0")
+    assert main(["-t", "wikipage", "--files-from", str(files_from)]) == 0
+    assert "B." in capsys.readouterr().out
+
+
+def test_cli_files_from_checked(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test that paths read with `--files-from` are checked like file arguments.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        capsys: Pytest fixture to capture output.
+    """
+    files_from = tmp_path / "files"
+    files_from.write_bytes(str(tmp_path / "missing.sh").encode() + b"\0")
+    with pytest.raises(SystemExit, match="2"):
+        main(["--files-from", str(files_from)])
+    assert "missing.sh is not a valid file path" in capsys.readouterr().err
+    with pytest.raises(SystemExit, match="2"):
+        main(["--files-from", str(tmp_path / "missing")])
+    assert "argument --files-from: cannot read" in capsys.readouterr().err
+
+
+def test_cli_no_files_found(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that directories and patterns without shell scripts are reported.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        capsys: Pytest fixture to capture output.
+        caplog: Pytest fixture to capture logs.
+    """
+    _make_tree(tmp_path)
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    output = tmp_path / "output.md"
+    assert main(["-o", str(output), str(empty), str(tmp_path / "*.nope")]) == 1
+    assert "no shell scripts found in inputs" in capsys.readouterr().err
+    assert caplog.messages == [f"No shell scripts found in {empty}", f"No shell scripts found in {tmp_path / '*.nope'}"]
+    assert not output.exists()
+    caplog.clear()
+    assert main(["-t", "wikipage", str(empty), str(tmp_path / "lib" / "*.sh")]) == 0
+    assert caplog.messages == [f"No shell scripts found in {empty}"]
+    assert "A." in capsys.readouterr().out
+
+
+def test_cli_merge_counts_found_files(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test that the warning about merging less than 2 inputs counts the files found in directories.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        capsys: Pytest fixture to capture output.
+    """
+    _make_tree(tmp_path)
+    assert main(["-t", "wikipage", "--merge", str(tmp_path / "lib" / "sub")]) == 0
+    assert "--merge option is ignored" in capsys.readouterr().err
+    assert main(["-t", "wikipage", "--merge", str(tmp_path)]) == 0
+    assert "--merge option is ignored" not in capsys.readouterr().err
@@ -0,0 +1,69 @@
+"""Tests for the `index` module."""
+
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, cast
+
+from shellman._internal.index import SectionIndex
+from shellman._internal.reader import DocStream, _merge
+
+if TYPE_CHECKING:
+    from shellman._internal.tags import EnvTag, FunctionTag, OptionTag
+
+_SCRIPT_A = """\
+## \\option -h, --help
+## Print this help and exit.
+## \\option --hash ALGO
+## Hash algorithm.
+## \\env HOME The home directory.
+## \\exit 0 Success.
+## \\function parse(file)
+## Parse a file.
+"""
+
+_SCRIPT_B = """\
+## \\option -v, --verbose
+## Increase verbosity.
+## \\env HOSTNAME The machine name.
+## \\exit 1 Failure.
+## \\function function render_all { ... }
+## \\function parse_args args...
+"""
+
+
+def test_section_index_lookups() -> None:
+    """Test looking up tags by key across merged documents."""
+    docs = [DocStream(io.StringIO(_SCRIPT_A), filename="a.sh"), DocStream(io.StringIO(_SCRIPT_B), filename="b.sh")]
+    index = SectionIndex([_merge(docs, "merged")])
+
+    (help_option,) = index.option("-h")
+    assert index.option("--help") == [help_option]
+    assert help_option.description == "Print this help and exit."
+    assert index.option("-x") == []
+    assert [option.long for option in cast("list[OptionTag]", index.prefix("option", "--h"))] == ["--hash", "--help"]
+    assert len(index.prefix("option", "-")) == 3
+
+    assert index.function("parse")[0].prototype == "parse(file)"
+    assert index.function("render_all")[0].prototype == "function render_all { ... }"
+    assert index.keys("function") == ["parse", "parse_args", "render_all"]
+    assert [function.prototype for function in cast("list[FunctionTag]", index.prefix("function", "parse"))] == [
+        "parse(file)",
+        "parse_args args...",
+    ]
+
+    assert index.env("HOME")[0].description == "The home directory."
+    assert [env.name for env in cast("list[EnvTag]", index.prefix("env", "HO"))] == ["HOME", "HOSTNAME"]
+    assert index.exit(1)[0].description == "Failure."
+    assert index.exit("0")[0].description == "Success."
+
+
+def test_section_index_add() -> None:
+    """Test adding documents to an index after querying it."""
+    index = SectionIndex()
+    index.add(DocStream(io.StringIO(_SCRIPT_A)))
+    assert index.keys("env") == ["HOME"]
+    index.add(DocStream(io.StringIO(_SCRIPT_B)))
+    assert index.keys("env") == ["HOME", "HOSTNAME"]
+    index.add(DocStream(io.StringIO(_SCRIPT_A)))
+    assert len(index.env("HOME")) == 2
@@ -2,9 +2,40 @@
 
 from __future__ import annotations
 
-from shellman._internal.reader import _preprocess_lines, _preprocess_stream
+import asyncio
+import io
+import pickle
+import random
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+from shellman._internal import reader
+from shellman._internal.reader import (
+    DocBlock,
+    DocBuffer,
+    DocFile,
+    DocLine,
+    DocStream,
+    DocType,
+    MergedDoc,
+    _preprocess_chunks,
+    _preprocess_lines,
+    _preprocess_mmap,
+    _preprocess_stream,
+    _tokenize,
+    read_files,
+    read_files_async,
+    tag_no_value_regex,
+    tag_value_regex,
+)
+from shellman._internal.tags import BriefTag, DescTag, EnvTag, OptionTag, UsageTag
 from tests.conftest import get_fake_script
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
 
 def test_preprocess_stream() -> None:
     """Test pre-processing of a stream."""
@@ -25,3 +56,392 @@ def test_preprocess_lines() -> None:
     with open(script) as stream:
         blocks = list(_preprocess_lines(_preprocess_stream(stream)))
     assert blocks
+
+
+def test_preprocess_mmap() -> None:
+    """Test pre-processing of a memory-mapped file."""
+    script = get_fake_script("simple.sh")
+    with open(script) as stream:
+        assert list(_preprocess_mmap(script)) == list(_preprocess_stream(stream))
+
+
+def test_preprocess_mmap_line_breaks(tmp_path: Path) -> None:
+    """Test that the memory-mapped reader counts lines like universal newlines mode.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_bytes(b"#!/bin/bash\r\n## \\brief hi\r\n  x=${a##*/} ## no\r\n\t## \\desc ok \r\rfoo\n## last")
+    with open(script, encoding="utf-8") as stream:
+        expected = list(_preprocess_stream(stream))
+    assert list(_preprocess_mmap(str(script))) == expected
+    assert [lineno for _, lineno, _ in expected] == [2, 4, 7]
+
+
+def test_doc_file_mmap(tmp_path: Path) -> None:
+    """Test that both reader modes produce the same sections.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = get_fake_script("simple.sh")
+    assert DocFile(script, use_mmap=True).sections == DocFile(script).sections
+    empty = tmp_path / "empty.sh"
+    empty.touch()
+    assert DocFile(str(empty), use_mmap=True).sections == {}
+
+
+def test_preprocess_chunks() -> None:
+    """Test pre-processing of a binary stream read by chunks, with lines crossing chunk boundaries."""
+    script = get_fake_script("simple.sh")
+    with open(script) as stream:
+        expected = [("", lineno, line) for _, lineno, line in _preprocess_stream(stream)]
+    for chunk_size in (1, 2, 3, 7, 64, 4096):
+        with open(script, "rb") as binary_stream:
+            assert list(_preprocess_chunks(binary_stream, chunk_size=chunk_size)) == expected
+
+
+def test_preprocess_chunks_line_breaks() -> None:
+    """Test that line breaks split across chunks are counted once."""
+    data = b"a\r\n## one\r\n" + b"x" * 100 + b"## not doc\r\r  \t## two\n\n## three"
+    expected = [("", 2, "## one"), ("", 5, "## two"), ("", 7, "## three")]
+    for chunk_size in (1, 2, 3, 5, 1000):
+        assert list(_preprocess_chunks(io.BytesIO(data), chunk_size=chunk_size)) == expected
+
+
+def test_doc_stream_chunks() -> None:
+    """Test that reading a text stream by chunks produces the same sections."""
+    script = get_fake_script("simple.sh")
+    with open(script, encoding="utf-8") as stream:
+        expected = DocStream(stream).sections
+    with open(script, encoding="utf-8") as stream:
+        assert DocStream(stream, chunk_size=16).sections == expected
+    with open(script, "rb") as binary_stream:
+        assert DocStream(binary_stream, chunk_size=16).sections == expected
+    with open(script, encoding="utf-8") as stream:
+        assert DocStream(io.StringIO(stream.read()), chunk_size=16).sections == expected
+
+
+def _tokenize_with_regexes(line: str) -> tuple[str, str, str]:
+    res = tag_value_regex.search(line)
+    if res:
+        tag, value = res.groups()
+        return DocType.TAG_VALUE, tag, value
+    res = tag_no_value_regex.search(line)
+    if res:
+        return DocType.TAG, res.groups()[0], ""
+    return DocType.VALUE, "", line
+
+
+def test_tokenize_matches_regexes() -> None:
+    """Test the single-pass tokenizer against the tag regexes on a generated corpus."""
+    rng = random.Random(42)  # noqa: S311
+    alphabet = " \t\r\n\x0b\xa0\u2003\\@_-aZé9:."
+    words = ["\\", "@", "\\brief", "@option", "\\function-brief", "\\_x", "\\9", "\\é", "value", " ", "  ", "\t"]
+    for _ in range(20_000):
+        if rng.random() < 0.5:
+            line = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        else:
+            line = "".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        assert _tokenize(line) == _tokenize_with_regexes(line), repr(line)
+
+
+def test_preprocess_lines_continuation() -> None:
+    """Test grouping of lines into blocks with the tag continuation rule."""
+    lines = [
+        ("", 1, "## \\function f"),
+        ("", 2, "## \\function-brief Brief."),
+        ("", 3, "## Continued."),
+        ("", 4, "## \\functions g"),
+        ("", 5, "## \\option -h"),
+        ("", 6, "## \\option-default"),
+    ]
+    blocks = list(_preprocess_lines(lines))
+    assert [[line.lineno for line in block.lines] for block in blocks] == [[1, 2, 3], [4], [5, 6]]
+    assert [line.doc_type for line in blocks[2].lines] == [DocType.TAG_VALUE, DocType.TAG]
+
+
+def test_compact_doc_lines() -> None:
+    """Test that doc lines are slotted, with interned paths and tags."""
+    first = DocLine("".join(["script", ".sh"]), 1, "".join(["func", "tion"]), "f")
+    second = DocLine("".join(["script", ".sh"]), 2, "".join(["func", "tion"]), "")
+    assert not hasattr(first, "__dict__")
+    assert first.path is second.path
+    assert first.tag is second.tag
+    assert (first.doc_type, second.doc_type) == (DocType.TAG_VALUE, DocType.TAG)
+    assert DocLine("script.sh", 3, None, "value").doc_type == DocType.VALUE
+    second.value = "g"
+    assert second.doc_type == DocType.TAG_VALUE
+    second.tag = ""
+    assert second.doc_type == DocType.VALUE
+
+
+def test_doc_block_values() -> None:
+    """Test that block values follow changes of the block's lines."""
+    block = DocBlock([DocLine("script.sh", 1, "brief", "Brief.")])
+    assert block.values == ["Brief."]
+    block.values.append("Other.")
+    assert block.values == ["Brief."]
+    block.append(DocLine("script.sh", 2, None, "More."))
+    block.lines[0].value = "Summary."
+    assert block.values == ["Summary.", "More."]
+
+
+def test_read_files_in_parallel(tmp_path: Path) -> None:
+    """Test that files read in parallel are returned in order, with their sections.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    paths = []
+    for index in range(8):
+        script = tmp_path / f"script{index}.sh"
+        script.write_text(f"## \\brief Script {index}.\n## \\option -h, --help\n## Print help.\n")
+        paths.append(str(script))
+    sequential = read_files(paths)
+    parallel = read_files(paths, jobs=3)
+    assert [doc.filepath for doc in parallel] == paths
+    assert [doc.sections for doc in parallel] == [doc.sections for doc in sequential]
+    option = parallel[0].sections["option"][0]
+    assert isinstance(option, OptionTag)
+    assert option.signature == "-h, --help "
+
+
+def test_read_files_async(tmp_path: Path) -> None:
+    """Test that files read asynchronously are returned in order, already parsed.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    paths = []
+    for index in range(8):
+        script = tmp_path / f"script{index}.sh"
+        script.write_text(f"## \\brief Script {index}.\n")
+        paths.append(str(script))
+    docs = asyncio.run(read_files_async(paths, only_sections={"brief"}))
+    assert [doc.filepath for doc in docs] == paths
+    assert all(doc._sections is not None for doc in docs)
+    briefs = [doc.sections["brief"][0] for doc in docs]
+    assert all(isinstance(brief, BriefTag) for brief in briefs)
+    assert [cast("BriefTag", brief).text for brief in briefs] == [f"Script {index}." for index in range(8)]
+    assert asyncio.run(read_files_async(paths[:1], lazy=False))[0].filepath == paths[0]
+    with pytest.raises(ValueError, match="lazy"):
+        asyncio.run(read_files_async(paths, lazy=True))
+
+
+def test_pickle_sections() -> None:
+    """Test that parsed sections can be sent between processes."""
+    sections = DocFile(get_fake_script("simple.sh")).sections
+    assert pickle.loads(pickle.dumps(sections)) == sections  # noqa: S301
+
+
+def test_lazy_doc_file(tmp_path: Path) -> None:
+    """Test that lazy files are parsed on first access only.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_text("#!/bin/bash\n## \\brief Before.\n")
+    doc = DocFile(str(script), lazy=True)
+    assert doc.has_docs()
+    script.write_text("#!/bin/bash\n## \\brief After.\n")
+    brief = doc.sections["brief"][0]
+    assert isinstance(brief, BriefTag)
+    assert brief.text == "After."
+    script.write_text("#!/bin/bash\n")
+    assert doc.sections["brief"][0] is brief
+    assert not DocFile(str(script), lazy=True).has_docs()
+    empty = tmp_path / "empty.sh"
+    empty.touch()
+    assert not DocFile(str(empty), lazy=True).has_docs()
+
+
+def test_lazy_sections(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that tags of a section are built on first access only.
+
+    Parameters:
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    built = []
+    from_lines = BriefTag.from_lines
+
+    def spy_from_lines(cls: type[BriefTag], lines: Sequence[DocLine]) -> BriefTag:  # noqa: ARG001
+        built.append(lines)
+        return from_lines(lines)
+
+    monkeypatch.setattr(BriefTag, "from_lines", classmethod(spy_from_lines))
+    doc = DocStream(io.StringIO("## \\brief One.\n## \\usage prog [-h]\n## \\brief Two.\n"))
+    merged = MergedDoc([doc])
+    assert list(doc.sections) == list(merged.sections) == ["brief", "usage"]
+    usage = merged.sections["usage"][0]
+    assert isinstance(usage, UsageTag)
+    assert usage.program == "prog"
+    assert not built
+    briefs = doc.sections["brief"]
+    assert [cast("BriefTag", brief).text for brief in briefs] == ["One.", "Two."]
+    assert len(built) == 2
+    assert doc.sections["brief"] is briefs
+    assert len(built) == 2
+    assert pickle.loads(pickle.dumps(doc.sections)) == doc.sections  # noqa: S301
+
+
+def test_header_only(tmp_path: Path) -> None:
+    """Test reading documentation at the top of files only.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_bytes(
+        b"#!/bin/bash\r\n## \\brief Brief.\r## \\usage prog\n\n# Comment.\n  ## \\env HOME Home.\n"
+        b"set -e\n## \\env PATH Path.\n",
+    )
+    assert DocFile(str(script)).sections.keys() == {"brief", "usage", "env"}
+    assert len(DocFile(str(script)).sections["env"]) == 2
+    header = DocFile(str(script), header_only=True)
+    assert header.sections.keys() == {"brief", "usage", "env"}
+    assert [cast("EnvTag", env).name for env in header.sections["env"]] == ["HOME"]
+    usage = header.sections["usage"][0]
+    assert isinstance(usage, UsageTag)
+    assert usage.program == "prog"
+    assert list(DocFile(str(script), max_header_lines=2).sections) == ["brief"]
+    assert list(DocFile(str(script), max_header_bytes=12).sections) == []
+    assert list(DocFile(str(script), max_header_bytes=44).sections) == ["brief"]
+    assert list(DocFile(str(script), max_header_bytes=45).sections) == ["brief", "usage"]
+
+
+def test_doc_buffer_edits() -> None:
+    """Test that incremental updates of a buffer give the same sections as a full parse."""
+    rng = random.Random(7)  # noqa: S311
+    choices = [
+        "## \\function f()",
+        "## \\function-brief Brief.",
+        "## \\function-argument x",
+        "## \\functions",
+        "## \\option -h, --help",
+        "## \\option-default 1",
+        "## \\brief Summary.",
+        "## \\desc",
+        "## Some text.",
+        "  ## Indented text.",
+        "echo code",
+        "",
+    ]
+    buffer = DocBuffer(rng.choice(choices) for _ in range(50))
+    for _ in range(500):
+        start = rng.randint(0, len(buffer.lines))
+        stop = rng.randint(start, min(start + 4, len(buffer.lines)))
+        buffer.edit(start, stop, [rng.choice(choices) for _ in range(rng.randint(0, 4))])
+        assert buffer.sections == DocStream(buffer.lines).sections
+        fresh = DocBuffer(buffer.lines)
+        assert [buffer._start(index) for index in range(len(buffer._starts))] == fresh._starts
+
+
+def test_doc_buffer_from_file() -> None:
+    """Test reading a buffer from a file."""
+    script = get_fake_script("simple.sh")
+    buffer = DocBuffer.from_file(script)
+    assert buffer.sections == DocFile(script).sections
+    buffer.edit(3, 4, ["## \\desc This script does nothing.", "## Really."])
+    desc = buffer.sections["desc"][0]
+    assert isinstance(desc, DescTag)
+    assert desc.text == "This script does nothing.\nReally."
+
+
+def test_sharded_parsing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that scanning shards in parallel gives the same sections as a serial parse.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setattr(reader, "_MIN_SHARD_SIZE", 16)
+    rng = random.Random(11)  # noqa: S311
+    choices = [
+        "## \\function f()",
+        "## \\function-brief Brief.",
+        "## \\function-argument x",
+        "## \\option -h, --help",
+        "## \\option-default 1",
+        "## \\brief Summary.",
+        "## Some text.",
+        "echo code",
+    ]
+    script = tmp_path / "script.sh"
+    for _ in range(10):
+        script.write_text("\n".join(rng.choice(choices) for _ in range(200)))
+        expected = DocFile(str(script)).sections
+        for shards in (2, 3, 7):
+            assert DocFile(str(script), shards=shards).sections == expected
+
+
+def test_binary_content_outside_docs(tmp_path: Path) -> None:
+    """Test that undecodable content outside of documentation lines is ignored.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    script = tmp_path / "script.sh"
+    script.write_bytes(
+        b"## \\brief Extract payload.\ncat <<'EOF' | tar xz\n\x1f\x8b\x08\xff\xfe\nEOF\n## \\usage extract\n",
+    )
+    for kwargs in ({}, {"use_mmap": True}, {"shards": 2}):
+        doc = DocFile(str(script), **kwargs)  # type: ignore[arg-type]
+        brief, usage = doc.sections["brief"][0], doc.sections["usage"][0]
+        assert isinstance(brief, BriefTag)
+        assert isinstance(usage, UsageTag)
+        assert brief.text == "Extract payload."
+        assert usage.program == "extract"
+        assert doc.decode_errors == []
+
+
+def test_undecodable_doc_lines(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test the error policy for documentation lines that cannot be decoded.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        caplog: Pytest fixture to capture logs.
+    """
+    script = tmp_path / "script.sh"
+    script.write_bytes(b"## \\brief Caf\xe9.\necho\n## \\usage \xff\n")
+    doc = DocFile(str(script))
+    assert doc.sections == {}
+    assert doc.decode_errors == [1]
+    assert "line 1" in caplog.text
+    for kwargs in ({}, {"use_mmap": True}):
+        doc = DocFile(str(script), errors="replace", **kwargs)  # type: ignore[arg-type]
+        brief = doc.sections["brief"][0]
+        assert isinstance(brief, BriefTag)
+        assert brief.text == "Caf�."
+        assert doc.decode_errors == [1, 3]
+    assert "1, 3" in caplog.text
+
+
+def test_merged_doc_view() -> None:
+    """Test that merged documents chain sections without copying them."""
+    first = DocFile(get_fake_script("simple.sh"))
+    second = DocStream(io.StringIO("## \\brief Other.\n## \\env HOME Home.\n## \\brief Last.\n"))
+    merged = MergedDoc([first, second], filename="merged")
+    expected: dict[str, list] = {}
+    for doc in (first, second):
+        for name, tags in doc.sections.items():
+            expected.setdefault(name, []).extend(tags)
+    assert list(merged.sections) == list(expected)
+    assert merged.sections == expected
+    briefs = merged.sections["brief"]
+    assert len(briefs) == len(expected["brief"])
+    last = briefs[-1]
+    assert isinstance(last, BriefTag)
+    assert last.text == "Last."
+    assert briefs[len(first.sections["brief"])] is second.sections["brief"][0]
+    assert briefs[1:] == expected["brief"][1:]
+    assert "function" not in merged.sections
+    merged.sections["function"] = []
+    merged.sections["brief"] = []
+    assert merged.sections["brief"] == []
+    assert first.sections["brief"]
+    del merged.sections["env"]
+    assert "env" not in merged.sections
+    assert "env" in second.sections
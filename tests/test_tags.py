@@ -1,7 +1,18 @@
 """Tests for the `tags` module."""
 
-from shellman._internal.reader import DocLine
+from __future__ import annotations
+
+import io
+import pickle
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from shellman._internal.reader import DocLine, DocStream
 from shellman._internal.tags import (
+    TAGS,
+    AppendField,
     AuthorTag,
     BriefTag,
     BugTag,
@@ -19,12 +30,21 @@ from shellman._internal.tags import (
     LicenseTag,
     NoteTag,
     OptionTag,
+    ParseField,
     SeealsoTag,
+    SetField,
     StderrTag,
     StdinTag,
     StdoutTag,
+    Tag,
+    TagSchema,
+    TextTag,
     UsageTag,
     VersionTag,
+    _compile_continued,
+    _compile_schema,
+    _decode_sections,
+    _encode_sections,
 )
 
 
@@ -158,8 +178,8 @@ def test_function_tag() -> None:
     assert tag.prototype == "my_function()"
     assert tag.brief == "A brief description."
     assert tag.description == "Detailed description."
-    assert tag.arguments == ["arg1: Argument 1"]
-    assert tag.return_codes == ["0: Success"]
+    assert tag.arguments == ("arg1: Argument 1",)
+    assert tag.return_codes == ("0: Success",)
 
 
 def test_history_tag() -> None:
@@ -253,3 +273,162 @@ def test_version_tag() -> None:
     tag = VersionTag.from_lines(lines)
     assert isinstance(tag, VersionTag)
     assert tag.text == "1.0.0"
+
+
+def test_schema_tag(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test registering a new tag described by a schema.
+
+    Parameters:
+        monkeypatch: Pytest fixture to patch objects.
+    """
+
+    @dataclass(frozen=True)
+    class TodoTag(Tag):
+        schema = TagSchema(
+            {"todo": SetField("title"), "todo-assignee": AppendField("assignees")},
+            default=AppendField("details"),
+            joined=("details",),
+        )
+
+        title: str
+        assignees: tuple[str, ...]
+        details: str
+
+    monkeypatch.setitem(TAGS, "todo", TodoTag)
+    doc = DocStream(
+        io.StringIO(
+            "## \\todo Parse faster.\n## \\todo-assignee alice\n## Use a schema.\n## \\todo-assignee bob\n",
+        ),
+    )
+    assert doc.sections["todo"] == [TodoTag(title="Parse faster.", assignees=("alice", "bob"), details="Use a schema.")]
+
+
+def test_tags_are_frozen_and_hashable() -> None:
+    """Test that tags are immutable, hashable and without instance dictionaries."""
+    tag = FunctionTag(
+        prototype="f()",
+        brief="Brief.",
+        description="",
+        arguments=("x: An argument.",),
+        preconditions=(),
+        return_codes=("0: Success.",),
+        seealso=(),
+        stderr=(),
+        stdin=(),
+        stdout=(),
+    )
+    assert not hasattr(tag, "__dict__") or not tag.__dict__
+    assert hash(tag) == hash(FunctionTag(**{name: getattr(tag, name) for name in tag.__dataclass_fields__}))
+    assert len({tag, tag, TextTag(text="text")}) == 2
+    with pytest.raises(AttributeError):
+        tag.brief = "Other."  # type: ignore[misc]
+    author = AuthorTag(text="Me")
+    assert not hasattr(author, "__dict__") or not author.__dict__
+    assert author != BugTag(text="Me")
+    assert repr(author) == "AuthorTag(text='Me')"
+    with pytest.raises(AttributeError):
+        author.text = "You"  # type: ignore[misc]
+
+
+def test_schemas_are_compiled_lazily() -> None:
+    """Test that schemas are compiled into parsers the first time they are used."""
+
+    @dataclass(frozen=True)
+    class LazyTag(Tag):
+        schema = TagSchema({}, default=AppendField("text"), joined=("text",))
+
+        text: str
+
+    assert LazyTag.__dict__["from_lines"].function is None
+    assert LazyTag.from_lines([DocLine(tag=None, value="Text.", path="", lineno=1)]) == LazyTag(text="Text.")
+    assert LazyTag.__dict__["from_lines"].function is not None
+
+
+def test_tag_serialization() -> None:
+    """Test encoding tags in their compact binary format, and pickling them."""
+    option = OptionTag.from_lines(
+        [
+            DocLine(tag="option", value="-h, --help", path="", lineno=1),
+            DocLine(tag=None, value="Print help \udcff.", path="", lineno=2),
+        ],
+    )
+    assert OptionTag.from_bytes(option.to_bytes()) == option
+    assert OptionTag.from_bytes(option.to_bytes()).signature == "-h, --help "
+    assert pickle.loads(pickle.dumps(option)) == option  # noqa: S301
+    for data in (option.to_bytes()[:-1], option.to_bytes() + b"\0", b"\x07"):
+        with pytest.raises(ValueError, match="invalid encoding"):
+            OptionTag.from_bytes(data)
+
+
+class _PlainTag(Tag):
+    __slots__ = ("count",)
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+
+@dataclass(frozen=True)
+class _CountTag(Tag):
+    count: int
+
+
+def test_custom_tag_serialization() -> None:
+    """Test that tags the compact format cannot encode are pickled normally, and rejected by the encoder."""
+    plain = pickle.loads(pickle.dumps(_PlainTag(2)))  # noqa: S301
+    assert isinstance(plain, _PlainTag)
+    assert plain.count == 2
+    with pytest.raises(TypeError, match="not a dataclass"):
+        _PlainTag(2).to_bytes()
+    assert pickle.loads(pickle.dumps(_CountTag(2))) == _CountTag(2)  # noqa: S301
+    with pytest.raises(TypeError, match="int is not a string"):
+        _CountTag(2).to_bytes()
+    with pytest.raises(TypeError, match="expected BriefTag"):
+        _encode_sections({"brief": [TextTag(text="Text.")]})
+
+
+def test_sections_serialization() -> None:
+    """Test encoding documentation sections, including untagged blocks and unknown tags."""
+    doc = DocStream(io.StringIO("## Untagged.\n## \\brief Brief.\n## \\unknown Text.\n## \\exit 0 Success.\n"))
+    assert _decode_sections(_encode_sections(doc.sections)) == doc.sections
+
+
+def _split_some(value: str) -> list[str]:
+    return value.split(" ", 2)[: len(value) % 3]
+
+
+def _random_rule(rng: random.Random) -> SetField | AppendField | ParseField:
+    fields = ["a", "b", "c"]
+    continues = rng.choice([None, None, "c"])
+    kind = rng.randrange(3)
+    if kind == 0:
+        return SetField(rng.choice(fields), continues=continues, skip_empty=rng.random() < 0.3)
+    if kind == 1:
+        return AppendField(rng.choice(fields), continues=continues, skip_empty=rng.random() < 0.3)
+    return ParseField(_split_some, fields=tuple(rng.sample(fields, rng.randint(1, 2))), continues=continues)
+
+
+def test_schema_compilers_agree() -> None:
+    """Test that generated parsers and line-by-line parsers give the same fields on random schemas and lines."""
+    rng = random.Random(14)  # noqa: S311
+    for _ in range(500):
+        schema = TagSchema(
+            {tag: _random_rule(rng) for tag in rng.sample(["t", "t-x", "t-y"], rng.randint(0, 3))},
+            default=_random_rule(rng),
+            joined=tuple(rng.sample(["a", "b", "c"], rng.randint(0, 3))),
+        )
+        generated = _compile_schema(schema)
+        continued = _compile_continued(schema)
+        for _ in range(5):
+            lines = [
+                DocLine("", 1, rng.choice(["t", "t-x", "t-y", None, "other"]), rng.choice(["", "v", "w x", "y z w"]))
+                for _ in range(rng.randint(0, 6))
+            ]
+            assert generated(dict, lines) == continued(dict, lines), schema  # type: ignore[arg-type]
+
+
+def test_skip_empty_only_skips_its_rule() -> None:
+    """Test that skipping empty values of a rule keeps empty values added to the same field by other rules."""
+    schema = TagSchema({"notex": AppendField("text", skip_empty=True)}, default=AppendField("text"), joined=("text",))
+    lines = [DocLine("", 1, "notex", ""), DocLine("", 2, None, "Para one."), DocLine("", 3, None, "")]
+    lines.append(DocLine("", 4, None, "Para two."))
+    assert _compile_schema(schema)(dict, lines) == {"text": "Para one.\n\nPara two."}  # type: ignore[arg-type]
@@ -0,0 +1,374 @@
+"""Tests for the `templates` module."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+from jinja2 import DictLoader, Environment, ModuleLoader
+
+from shellman._internal import templates as templates_module
+from shellman._internal.cli import _render, _RenderSession, main
+from shellman._internal.reader import DocFile, DocStream, _merge
+from shellman._internal.tags import BriefTag
+from shellman._internal.templates import EntryPoint, Template, _get_builtin_path, _get_env, _rstrip_newlines, templates
+from shellman._internal.templates.filters import FILTERS
+from shellman._internal.templates.precompile import _ENV_OPTIONS, _MANIFEST, _compile, _precompiled_loader
+from tests.conftest import get_fake_script
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("{{ shellman.doc.usage[0].program }} {{ shellman.filename }}", {"usage"}),
+        ("{% if shellman.doc['env'] %}{% include 'partial' %}{% endif %}", {"env", "brief"}),
+        ("{% for name in shellman.doc %}{{ name }}{% endfor %}", None),
+        ("{% for name, tags in shellman.doc.items() %}{{ name }}{% endfor %}", None),
+        ("{{ shellman.doc[section] }}", None),
+        ("{% set doc = shellman.doc %}{{ doc.usage }}", None),
+        ("{{ shellman|tojson }}", None),
+        ("{% include name %}", None),
+    ],
+)
+def test_doc_sections(source: str, expected: set[str] | None) -> None:
+    """Test finding the sections read by templates.
+
+    Parameters:
+        source: The template source.
+        expected: The expected sections.
+    """
+    partial = "{# {{ shellman.doc.bug }} #}{{ shellman.doc.brief }}"
+    env = Environment(loader=DictLoader({"main": source, "partial": partial}))  # noqa: S701
+    assert Template(env, "main").doc_sections == (None if expected is None else frozenset(expected))
+
+
+@pytest.mark.parametrize("name", ["helptext", "manpage", "manpage.md", "usagetext", "wikipage"])
+def test_builtin_templates_pruned_sections(name: str) -> None:
+    """Test that parsing only the sections read by built-in templates gives the same output.
+
+    Parameters:
+        name: The template name.
+    """
+    template = templates[name]
+    assert template.doc_sections is not None
+    path = get_fake_script("simple.sh")
+    assert _render(template, DocFile(path, only_sections=template.doc_sections)) == _render(template, DocFile(path))
+
+
+def test_doc_sections_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the sections read by templates are cached, and invalidated when included templates change.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(tmp_path / "cache"))
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "main").write_text("{{ shellman.doc.usage }}{% include 'partial' %}")
+    (template_dir / "partial").write_text("{{ shellman.doc.brief }}")
+    assert Template(str(template_dir), "main").doc_sections == {"usage", "brief"}
+
+    # Cached results are not parsed again.
+    with monkeypatch.context() as patch:
+        patch.setattr(Environment, "parse", lambda *args: pytest.fail("template parsed again"))
+        assert Template(str(template_dir), "main").doc_sections == {"usage", "brief"}
+
+    # Changes to included templates invalidate results.
+    (template_dir / "partial").write_text("{% for section in shellman.doc %}{% endfor %}")
+    assert Template(str(template_dir), "main").doc_sections is None
+    (template_dir / "partial").write_text("{{ shellman.doc.env }}")
+    assert Template(str(template_dir), "main").doc_sections == {"usage", "env"}
+
+
+def test_doc_sections_without_sources(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """Test that templates whose sources cannot be analyzed read every section.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+        capsys: Pytest fixture to capture output.
+    """
+    source_env = Environment(loader=DictLoader({"main": "{{ shellman.doc.brief[0].text }}"}))  # noqa: S701
+    source_env.compile_templates(str(tmp_path), zip=None)
+    env = Environment(loader=ModuleLoader(str(tmp_path)))  # noqa: S701
+    template = Template(env, "main")
+    assert template.doc_sections is None
+    monkeypatch.setitem(templates, "compiled", template)
+    assert main(["-t", "compiled", get_fake_script("simple.sh")]) == 0
+    assert capsys.readouterr().out.strip() == "Just a demo"
+
+
+def test_helptext_sections() -> None:
+    """Test that sections commented out in the help text template are not read."""
+    sections = templates["helptext"].doc_sections
+    assert sections is not None
+    assert {"usage", "option", "function"} <= sections
+    assert not {"author", "bug", "error"} & sections
+
+
+def test_bytecode_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that compiled templates are cached on disk, and invalidated when their source changes.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(cache_dir))
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "main").write_text("{{ shellman.doc.brief[0].text }} {% include 'partial' %}")
+    (template_dir / "partial").write_text("one")
+    context = {"shellman": {"doc": {"brief": [BriefTag(text="Brief.")]}}}
+    assert Template(_get_env(str(template_dir)), "main").render(**context) == "Brief. one"
+    entries = list(cache_dir.rglob("*.cache"))
+    assert len(entries) == 2
+
+    # Cached templates are not parsed again.
+    monkeypatch.setattr(Environment, "_parse", lambda *args: pytest.fail("template parsed again"))
+    assert Template(_get_env(str(template_dir)), "main").render(**context) == "Brief. one"
+    monkeypatch.undo()
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(cache_dir))
+
+    # Changed sources are compiled again.
+    (template_dir / "partial").write_text("two")
+    assert Template(_get_env(str(template_dir)), "main").render(**context) == "Brief. two"
+
+    # Corrupted entries are ignored.
+    for entry in entries:
+        entry.write_bytes(entry.read_bytes()[:40])
+    (template_dir / "partial").write_text("three")
+    assert Template(_get_env(str(template_dir)), "main").render(**context) == "Brief. three"
+
+    # The cache can be disabled.
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, "")
+    assert _get_env(str(template_dir)).bytecode_cache is None
+
+
+def test_bytecode_cache_directory_read_on_use(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that environments created at import time read the cache directory when templates are compiled.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    bytecode_cache = templates_module._BytecodeCache()
+    env = Environment(loader=DictLoader({"main": "{{ 1 + 1 }}"}), bytecode_cache=bytecode_cache)  # noqa: S701
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(tmp_path))
+    assert env.get_template("main").render() == "2"
+    assert len(list(tmp_path.rglob("*.cache"))) == 1
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, "")
+    env.cache = None
+    assert env.get_template("main").render() == "2"
+    assert len(list(tmp_path.rglob("*.cache"))) == 1
+
+
+def test_precompiled_templates(tmp_path: Path) -> None:
+    """Test that compiled built-in templates render like their sources, and are not used when stale.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+    """
+    source_dir = _get_builtin_path()
+    compiled_dir = str(tmp_path)
+    assert _precompiled_loader(source_dir, compiled_dir) is None
+    assert _MANIFEST in _compile(source_dir, compiled_dir, FILTERS)
+
+    loader = _precompiled_loader(source_dir, compiled_dir)
+    assert loader is not None
+    env = Environment(loader=loader, **_ENV_OPTIONS)  # noqa: S701
+    doc = DocFile(get_fake_script("simple.sh"))
+    for name in ("helptext", "manpage", "manpage.md", "usagetext", "wikipage"):
+        template = Template(env, templates[name].base_template, templates[name].context)
+        assert template.doc_sections == templates[name].doc_sections
+        assert _render(template, doc) == _render(templates[name], doc)
+
+    manifest = tmp_path / _MANIFEST
+    manifest.write_text(manifest.read_text().replace('"jinja2": "', '"jinja2": "0'))
+    assert _precompiled_loader(source_dir, compiled_dir) is None
+
+
+def test_render_does_not_mutate_base_context() -> None:
+    """Test that renders are isolated from each other, and keyword arguments override the base context."""
+    source = "{% set _ = items.append(name) %}{{ items|join(',') }} {{ range(2)|list }}"
+    env = Environment(loader=DictLoader({"main": source}))  # noqa: S701
+    template = Template(env, "main", context={"items": ["a"], "name": "b"})
+    assert template.render() == "a,b [0, 1]"
+    assert template.render(name="c") == "a,c [0, 1]"
+    assert template.context == {"items": ["a"], "name": "b"}
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [[], ["\n"], ["a\n", "\n"], ["a", "\n\n", "", "b\n", "\n"], ["\n", "a\n\nb", "\n"], ["a", "b"]],
+)
+@pytest.mark.parametrize("batch_size", [1, 2, 1024])
+def test_rstrip_newlines(chunks: list[str], batch_size: int) -> None:
+    """Test trimming trailing newlines of chunks without joining them.
+
+    Parameters:
+        chunks: The chunks to trim.
+        batch_size: The number of chunks joined together.
+    """
+    assert "".join(_rstrip_newlines(chunks, batch_size)) == "".join(chunks).rstrip("\n")
+
+
+@pytest.mark.parametrize("name", ["helptext", "manpage", "manpage.md", "usagetext", "wikipage"])
+def test_generate_same_as_render(name: str) -> None:
+    """Test that streamed templates output the same text as rendered ones.
+
+    Parameters:
+        name: The template name.
+    """
+    session = _RenderSession(templates[name])
+    doc = DocFile(get_fake_script("simple.sh"))
+    assert "".join(session.generate(doc)) == session.render(doc)
+
+
+@pytest.mark.parametrize("name", ["helptext", "manpage", "manpage.md", "usagetext", "wikipage"])
+def test_render_async_same_as_render(name: str) -> None:
+    """Test that templates rendered asynchronously output the same text as rendered ones.
+
+    Parameters:
+        name: The template name.
+    """
+    template = templates[name]
+    functions = "## \\function parse(file)\n## \\function-argument file: The file.\n## \\function-return 0: Success.\n"
+    doc = _merge([DocFile(get_fake_script("simple.sh")), DocStream(io.StringIO(functions))], "simple.sh")
+    shellman = {"doc": doc.sections, "filename": doc.filename}
+    assert asyncio.run(template.render_async(shellman=shellman)) == template.render(shellman=shellman)
+
+
+def test_render_async_awaits_functions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that async functions are awaited, and that async templates are cached apart.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(tmp_path / "cache"))
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "main").write_text("{{ fetch(name) }}")
+
+    async def fetch(name: str) -> str:
+        await asyncio.sleep(0)
+        return name.upper()
+
+    template = Template(str(template_dir), "main", context={"fetch": fetch})
+    assert asyncio.run(template.render_async(name="async")) == "ASYNC"
+    assert template.render(name="sync", fetch=str.upper) == "SYNC"
+    assert sorted(path.name.split(".", 1)[1] for path in (tmp_path / "cache").rglob("*.cache")) == [
+        "async.cache",
+        "cache",
+    ]
+
+
+def test_lazy_plugin_templates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that plugins are indexed once, cached on disk, and only loaded when their templates are requested.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(templates_module, "templates", dict(templates))
+    monkeypatch.setattr(templates_module, "_loaded_plugins", set())
+    plugin = EntryPoint(name="plugin", value="shellman._internal.templates:usagetext", group="shellman")
+    monkeypatch.setattr(templates_module, "entry_points", lambda **kwargs: [plugin])
+    templates_module._plugin_index.cache_clear()
+    try:
+        assert templates_module._plugin_index() == {"plugin": ("plugin", plugin.value)}
+        assert "plugin" in templates_module._parser_choices()
+        assert "plugin" in templates_module._names()
+
+        # In a new process, the index is read from disk and plugins are not loaded until requested.
+        templates_module._plugin_index.cache_clear()
+        monkeypatch.setattr(templates_module, "templates", dict(templates))
+        monkeypatch.setattr(templates_module, "_loaded_plugins", set())
+        monkeypatch.setattr(templates_module, "entry_points", lambda **kwargs: pytest.fail("plugins scanned"))
+        assert "plugin" in templates_module._parser_choices()
+        assert "plugin" not in templates_module.templates
+        assert templates_module._get_template("plugin") is templates["usagetext"]
+        assert templates_module._get_template("helptext") is templates["helptext"]
+
+        # The index is built again when installed distributions change.
+        templates_module._plugin_index.cache_clear()
+        monkeypatch.setattr(templates_module, "_site_state", lambda: "changed")
+        monkeypatch.setattr(templates_module, "entry_points", lambda **kwargs: [])
+        assert templates_module._plugin_index() == {}
+    finally:
+        templates_module._plugin_index.cache_clear()
+        templates_module._rescan_plugin_index.cache_clear()
+
+
+def test_plugin_index_rescanned(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that plugins are scanned again, once, when a requested template is missing from the index.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    monkeypatch.setenv(templates_module.TEMPLATE_CACHE_ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(templates_module, "templates", dict(templates))
+    monkeypatch.setattr(templates_module, "_loaded_plugins", set())
+    monkeypatch.setattr(templates_module, "_site_state", lambda: "unchanged")
+    plugin = EntryPoint(name="plugin", value="shellman._internal.templates:usagetext", group="shellman")
+    scans = []
+
+    def fake_entry_points(**kwargs: str) -> list[EntryPoint]:
+        scans.append(kwargs)
+        return [plugin] if len(scans) > 1 else []
+
+    # The index is written before the plugin is installed, for example in editable mode.
+    monkeypatch.setattr(templates_module, "entry_points", fake_entry_points)
+    templates_module._plugin_index.cache_clear()
+    templates_module._rescan_plugin_index.cache_clear()
+    try:
+        assert templates_module._plugin_index() == {}
+        assert "plugin" in templates_module._parser_choices()
+        assert templates_module._get_template("plugin") is templates["usagetext"]
+        assert "missing" not in templates_module._parser_choices()
+        assert len(scans) == 2
+
+        # The index on disk is updated.
+        templates_module._plugin_index.cache_clear()
+        assert templates_module._plugin_index() == {"plugin": ("plugin", plugin.value)}
+        assert len(scans) == 2
+    finally:
+        templates_module._plugin_index.cache_clear()
+        templates_module._rescan_plugin_index.cache_clear()
+
+
+def test_plugin_index_site_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the plugin index is keyed on site directories only, not on the current directory.
+
+    Parameters:
+        tmp_path: Pytest fixture to create a temporary directory.
+        monkeypatch: Pytest fixture to patch objects.
+    """
+    project = tmp_path / "project"
+    site_packages = tmp_path / "lib" / "site-packages"
+    project.mkdir()
+    site_packages.mkdir(parents=True)
+    monkeypatch.setattr(sys, "path", ["", str(project), str(site_packages)])
+    monkeypatch.chdir(project)
+    state = templates_module._site_state()
+    (project / "script.sh").write_text("## \\brief Script.\n")
+    os.utime(project, ns=(0, 10**9))
+    assert templates_module._site_state() == state
+    (site_packages / "plugin-1.0.dist-info").mkdir()
+    os.utime(site_packages, ns=(0, 2 * 10**9))
+    assert templates_module._site_state() != state